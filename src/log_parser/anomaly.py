@@ -0,0 +1,236 @@
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from log_parser.uph_parser import iter_sessions
+
+
+@dataclass
+class Alert:
+    session_id: int
+    metric: str  # "uph" or "seconds_per_pallet"
+    kind: str  # "outlier" or "drop"
+    value: float
+    expected: float
+    z_score: Optional[float] = None
+
+    def __str__(self):
+        z = f", z={self.z_score:.1f}" if self.z_score is not None else ""
+        return (
+            f"Session {self.session_id}: {self.kind} in {self.metric} "
+            f"({self.value:.2f} vs expected {self.expected:.2f}{z})"
+        )
+
+
+class RunningStats:
+    """Welford running mean/variance, O(1) per update"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine two partial results (Chan et al. parallel update)"""
+        merged = RunningStats()
+        merged.count = self.count + other.count
+        if merged.count == 0:
+            return merged
+        delta = other.mean - self.mean
+        merged.mean = self.mean + delta * other.count / merged.count
+        merged.m2 = (
+            self.m2 + other.m2 + delta * delta * self.count * other.count / merged.count
+        )
+        return merged
+
+
+class Ewma:
+    """Exponentially weighted moving average"""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class MetricMonitor:
+    """
+    Score each new value against the history seen so far, then fold it in.
+
+    Args:
+        name: Metric name used in alerts
+        higher_is_better: True for UPH, False for cycle time
+        z_threshold: |z| above which a value is an outlier
+        drop_ratio: Relative move against the EWMA that counts as a sudden drop
+        alpha: EWMA smoothing factor
+        warmup: Values to observe before any alert is raised
+    """
+
+    def __init__(
+        self,
+        name: str,
+        higher_is_better: bool = True,
+        z_threshold: float = 3.0,
+        drop_ratio: float = 0.3,
+        alpha: float = 0.3,
+        warmup: int = 5,
+    ):
+        self.name = name
+        self.higher_is_better = higher_is_better
+        self.z_threshold = z_threshold
+        self.drop_ratio = drop_ratio
+        self.warmup = warmup
+        self.stats = RunningStats()
+        self.ewma = Ewma(alpha)
+
+    def update(self, session_id: int, x: float) -> List[Alert]:
+        alerts = []
+        if self.stats.count >= self.warmup:
+            std = self.stats.std
+            if std > 0:
+                z = (x - self.stats.mean) / std
+                if abs(z) > self.z_threshold:
+                    alerts.append(
+                        Alert(session_id, self.name, "outlier", x, self.stats.mean, z)
+                    )
+
+            expected = self.ewma.value
+            if self.higher_is_better:
+                dropped = x < expected * (1 - self.drop_ratio)
+            else:
+                dropped = x > expected * (1 + self.drop_ratio)
+            if dropped:
+                alerts.append(Alert(session_id, self.name, "drop", x, expected))
+
+        self.stats.update(x)
+        self.ewma.update(x)
+        return alerts
+
+
+class SessionAnomalyDetector:
+    """Online UPH and cycle-time monitor fed one closed session at a time"""
+
+    def __init__(self, **kwargs):
+        self.uph = MetricMonitor("uph", higher_is_better=True, **kwargs)
+        self.seconds_per_pallet = MetricMonitor(
+            "seconds_per_pallet", higher_is_better=False, **kwargs
+        )
+
+    def update(
+        self,
+        session_id: int,
+        uph: Optional[float],
+        seconds_per_pallet: Optional[float],
+    ) -> List[Alert]:
+        alerts = []
+        if uph is not None:
+            alerts.extend(self.uph.update(session_id, uph))
+        if seconds_per_pallet is not None:
+            alerts.extend(
+                self.seconds_per_pallet.update(session_id, seconds_per_pallet)
+            )
+        return alerts
+
+    def update_session(self, s) -> List[Alert]:
+        return self.update(s.session_id, s.uph, s.seconds_per_pallet)
+
+
+def detect_anomalies(sessions: Iterable[dict], **kwargs) -> Dict[int, List[Alert]]:
+    """
+    Run the detector over parsed session dicts (as used by the plotting
+    scripts) in order and return alerts keyed by session_id.
+    """
+    detector = SessionAnomalyDetector(**kwargs)
+    flagged: Dict[int, List[Alert]] = {}
+    for s in sessions:
+        alerts = detector.update(
+            s["session_id"], s.get("uph"), s.get("sec_per_pallet")
+        )
+        if alerts:
+            flagged[s["session_id"]] = alerts
+    return flagged
+
+
+def follow_lines(file_path: str, poll_interval: float = 1.0) -> Iterator[str]:
+    """
+    Yield lines from file_path, then keep yielding lines as they are appended.
+    Lines are decoded once complete, with undecodable bytes replaced (as
+    log_reader does), so a bad byte or a character split across two writes
+    does not stop the tail.
+    """
+    f = open(file_path, "rb")
+    try:
+        inode = os.fstat(f.fileno()).st_ino
+        partial = b""
+        while True:
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith(b"\n"):
+                    text = partial.decode("utf-8", errors="replace")
+                    yield text[:-2] + "\n" if text.endswith("\r\n") else text
+                    partial = b""
+                continue
+
+            # At the end of the file: check for rotation or truncation
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                st = None  # rotated away, new file not created yet
+            if st is not None and st.st_ino != inode:
+                # Replaced: the old file is fully read, follow the new one
+                f.close()
+                f = open(file_path, "rb")
+                inode = os.fstat(f.fileno()).st_ino
+                partial = b""
+                continue
+            if st is not None and st.st_size < f.tell():
+                # Same file truncated in place
+                f.seek(0)
+                partial = b""
+                continue
+            time.sleep(poll_interval)
+    finally:
+        f.close()
+
+
+def tail_log(file_path: str, poll_interval: float = 1.0, **kwargs):
+    """Follow a live log and print alerts as each session closes"""
+    detector = SessionAnomalyDetector(**kwargs)
+    print(f"Watching {file_path} for UPH / cycle time anomalies...")
+    for s in iter_sessions(follow_lines(file_path, poll_interval)):
+        for alert in detector.update_session(s):
+            print(f"[ALERT] {s.date} {s.start_time} {alert}")
+
+
+if __name__ == "__main__":
+    # Configuration - Change this to the live log file
+    live_log = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log"
+
+    tail_log(live_log)
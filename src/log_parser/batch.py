@@ -0,0 +1,400 @@
+"""
+Memory-governed batch runner for backfills.
+
+Every job runs in its own process so its resident memory can be measured
+(/proc/<pid>/status) and, if needed, reclaimed. The scheduler:
+
+  * admits a job only while the RSS of running jobs plus the job's
+    expected peak stays under a global budget
+  * keeps a concurrency limit per job kind - "io" (decompression, copies)
+    may oversubscribe the CPUs, "cpu" gets one worker per core, "memory"
+    starts at one - and adapts it: +1 after a clean run, halved whenever
+    the budget is exceeded
+  * when running jobs go over the budget, stops the largest one that has
+    a low-memory variant (e.g. the error splitter with spill_bytes) and
+    requeues it in that mode, or requeues the youngest job to run later
+  * writes every job's return value to a pickle in the spill folder
+    instead of holding results in the parent
+"""
+
+import gzip
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from log_parser.log_reader import iter_lines
+from log_parser.test_error_2 import create_separate_error_files
+from log_parser.uph_parser import iter_sessions, write_sessions_to_file
+
+MB = 1 << 20
+
+JOB_KINDS = ("io", "cpu", "memory")
+
+# First guess at a job's peak RSS as a multiple of its input size, until a
+# job of the same kind has been measured
+SIZE_FACTORS = {"io": 0.1, "cpu": 0.5, "memory": 4.0}
+
+BASE_RSS = 40 * MB  # interpreter + imports of a fresh worker
+
+
+def read_rss(pid: int) -> int:
+    """Resident set size of a process in bytes (0 if unknown)"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable  # must be importable (top-level) to run in a worker
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    kind: str = "cpu"
+    input_size: int = 0  # bytes; used for the first memory estimate
+    # Merged into kwargs when the job is rerun after going over budget
+    low_memory_kwargs: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        if self.kind not in JOB_KINDS:
+            raise ValueError(f"Job {self.name}: unknown kind '{self.kind}'")
+
+
+@dataclass
+class JobResult:
+    name: str
+    ok: bool
+    seconds: float
+    peak_rss: int
+    result_file: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
+    low_memory: bool = False
+
+    def load(self):
+        """The job's return value, read back from the spill folder"""
+        if self.result_file is None:
+            return None
+        with open(self.result_file, "rb") as f:
+            return pickle.load(f)
+
+
+def _run_job(fn, args, kwargs, result_file):
+    try:
+        result = fn(*args, **kwargs)
+        with open(result_file, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        with open(result_file + ".err", "w", encoding="utf-8") as f:
+            f.write(traceback.format_exc())
+        raise SystemExit(1)
+
+
+@dataclass
+class _Running:
+    job: Job
+    process: Any
+    result_file: str
+    started: float
+    attempts: int
+    low_memory: bool
+    peak_rss: int = 0
+
+
+class BatchScheduler:
+    def __init__(
+        self,
+        memory_budget: int = 4096 * MB,
+        max_workers: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        poll_interval: float = 0.1,
+        verbose: bool = True,
+    ):
+        cpus = os.cpu_count() or 1
+        self.memory_budget = memory_budget
+        self.max_workers = max_workers or cpus * 2
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="batch_")
+        self.poll_interval = poll_interval
+        self.verbose = verbose
+        self.max_limits = {
+            "io": self.max_workers,
+            "cpu": min(cpus, self.max_workers),
+            "memory": min(cpus, self.max_workers),
+        }
+        self.limits = {"io": self.max_limits["io"], "cpu": self.max_limits["cpu"]}
+        self.limits["memory"] = 1
+        self.estimates: Dict[str, int] = {}  # kind -> largest measured peak
+        self._context = get_context()
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(message)
+
+    def estimate(self, job: Job) -> int:
+        measured = self.estimates.get(job.kind)
+        if measured is not None:
+            return measured
+        return BASE_RSS + int(job.input_size * SIZE_FACTORS[job.kind])
+
+    def _start(self, job: Job, attempts: int, low_memory: bool) -> _Running:
+        kwargs = dict(job.kwargs)
+        if low_memory and job.low_memory_kwargs:
+            kwargs.update(job.low_memory_kwargs)
+        result_file = os.path.join(self.spill_dir, f"{job.name}.pkl")
+        process = self._context.Process(
+            target=_run_job, args=(job.fn, job.args, kwargs, result_file)
+        )
+        process.start()
+        mode = " (low memory)" if low_memory else ""
+        self._log(f"  start {job.name}{mode}")
+        return _Running(
+            job, process, result_file, time.perf_counter(), attempts, low_memory
+        )
+
+    def _stop(self, run: _Running):
+        run.process.terminate()
+        run.process.join()
+        for path in (run.result_file, run.result_file + ".err"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _collect(self, run: _Running) -> JobResult:
+        run.process.join()
+        seconds = time.perf_counter() - run.started
+        ok = run.process.exitcode == 0
+        error = None
+        if not ok:
+            err_file = run.result_file + ".err"
+            if os.path.exists(err_file):
+                with open(err_file, "r", encoding="utf-8") as f:
+                    error = f.read()
+            else:
+                error = f"exit code {run.process.exitcode}"
+        self._measured(run)
+        return JobResult(
+            run.job.name,
+            ok,
+            seconds,
+            run.peak_rss,
+            run.result_file if ok else None,
+            error,
+            run.attempts,
+            run.low_memory,
+        )
+
+    def _measured(self, run: _Running):
+        # Jobs that finish between two polls are never sampled
+        if run.peak_rss:
+            kind = run.job.kind
+            self.estimates[kind] = max(self.estimates.get(kind, 0), run.peak_rss)
+
+    def _shrink(self, kind: str):
+        self.limits[kind] = max(1, self.limits[kind] // 2)
+
+    def run(self, jobs: Sequence[Job]) -> Dict[str, JobResult]:
+        # (job, attempts, low_memory)
+        pending = [(job, 1, False) for job in jobs]
+        running: List[_Running] = []
+        results: Dict[str, JobResult] = {}
+
+        while pending or running:
+            # Measure
+            rss = {}
+            for run in running:
+                rss[run.process.pid] = read_rss(run.process.pid)
+                run.peak_rss = max(run.peak_rss, rss[run.process.pid])
+
+            # Collect finished jobs; a clean run earns its kind one more slot
+            for run in [r for r in running if not r.process.is_alive()]:
+                running.remove(run)
+                result = results[run.job.name] = self._collect(run)
+                status = "done" if result.ok else "FAILED"
+                self._log(
+                    f"  {status} {run.job.name} in {result.seconds:.1f}s, "
+                    f"peak {result.peak_rss / MB:.0f} MB"
+                )
+                if result.ok:
+                    kind = run.job.kind
+                    self.limits[kind] = min(
+                        self.limits[kind] + 1, self.max_limits[kind]
+                    )
+
+            # Over budget: reclaim memory from the running jobs
+            total = sum(rss[r.process.pid] for r in running)
+            if total > self.memory_budget and running:
+                spillable = [
+                    r
+                    for r in running
+                    if r.job.low_memory_kwargs and not r.low_memory
+                ]
+                victim = None
+                if spillable:
+                    victim = max(spillable, key=lambda r: r.peak_rss)
+                elif len(running) > 1:
+                    victim = max(running, key=lambda r: r.started)
+                if victim is not None:
+                    self._stop(victim)
+                    running.remove(victim)
+                    kind = victim.job.kind
+                    self._measured(victim)
+                    self._shrink(kind)
+                    low_memory = victim.low_memory or bool(spillable)
+                    self._log(
+                        f"  over budget ({total / MB:.0f} MB): requeue "
+                        f"{victim.job.name}{' in low memory' if low_memory else ''}"
+                    )
+                    pending.insert(
+                        0, (victim.job, victim.attempts + 1, low_memory)
+                    )
+                    continue
+
+            # Admit what fits
+            committed = sum(max(r.peak_rss, self.estimate(r.job)) for r in running)
+            for item in list(pending):
+                if len(running) >= self.max_workers:
+                    break
+                job, attempts, low_memory = item
+                in_kind = sum(1 for r in running if r.job.kind == job.kind)
+                if in_kind >= self.limits[job.kind]:
+                    continue
+                needed = self.estimate(job)
+                # A job always runs when nothing else is, whatever its estimate
+                if running and committed + needed > self.memory_budget:
+                    continue
+                pending.remove(item)
+                running.append(self._start(job, attempts, low_memory))
+                committed += needed
+
+            time.sleep(self.poll_interval)
+
+        return results
+
+    def cleanup(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+# ============================================================================
+# Backfill jobs
+# ============================================================================
+
+
+def decompress_log(source: str, target: str) -> str:
+    """gunzip an archived log next to its output (I/O bound)"""
+    with gzip.open(source, "rb") as src, open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    return target
+
+
+def write_log_sessions(log_path: str, output_file: str) -> int:
+    """Sessions streamed straight to the output file; returns the count"""
+    return write_sessions_to_file(iter_sessions(iter_lines(log_path)), output_file)
+
+
+def _input_size(path: str) -> int:
+    # A missing log still gets its jobs: they fail with the real error and
+    # are recorded like any other failure instead of aborting the backfill
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def backfill_jobs(
+    log_paths: Sequence[str],
+    output_root: str,
+    spill_bytes: int = 64 * MB,
+    spill_dir: Optional[str] = None,
+) -> List[List[Job]]:
+    """
+    Jobs for a backfill, in waves: decompress any .gz logs, then parse and
+    split every log. Run each wave after the previous one finishes.
+    Low-memory error splits spill to spill_dir (default: their output
+    folder); pass the scheduler's spill folder so a split stopped mid-run
+    leaves nothing in the output.
+    """
+    decompress, process = [], []
+    for i, log_path in enumerate(log_paths):
+        out_dir = os.path.join(output_root, f"{i:04d}")
+        os.makedirs(out_dir, exist_ok=True)
+        if log_path.endswith(".gz"):
+            target = os.path.join(out_dir, "App.log")
+            decompress.append(
+                Job(
+                    f"decompress_{i:04d}",
+                    decompress_log,
+                    (log_path, target),
+                    kind="io",
+                    input_size=_input_size(log_path),
+                )
+            )
+            log_path = target
+            size = decompress[-1].input_size * 8
+        else:
+            size = _input_size(log_path)
+        process.append(
+            Job(
+                f"sessions_{i:04d}",
+                write_log_sessions,
+                (log_path, os.path.join(out_dir, "sessions.txt")),
+                kind="cpu",
+                input_size=size,
+            )
+        )
+        process.append(
+            Job(
+                f"errors_{i:04d}",
+                create_separate_error_files,
+                (log_path, os.path.join(out_dir, "error_logs")),
+                kind="memory",
+                input_size=size,
+                low_memory_kwargs={"spill_bytes": spill_bytes, "spill_dir": spill_dir},
+            )
+        )
+    return [wave for wave in (decompress, process) if wave]
+
+
+def run_backfill(
+    log_paths: Sequence[str],
+    output_root: str,
+    memory_budget: int = 4096 * MB,
+    max_workers: Optional[int] = None,
+) -> Dict[str, JobResult]:
+    # Job results stay in output_root/_batch for JobResult.load()
+    scheduler = BatchScheduler(
+        memory_budget, max_workers, spill_dir=os.path.join(output_root, "_batch")
+    )
+    results: Dict[str, JobResult] = {}
+    for wave in backfill_jobs(log_paths, output_root, spill_dir=scheduler.spill_dir):
+        results.update(scheduler.run(wave))
+    # Spill folders of splits stopped over budget (their finally never ran)
+    for name in os.listdir(scheduler.spill_dir):
+        path = os.path.join(scheduler.spill_dir, name)
+        if name.startswith("spill_") and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+    failed = [r for r in results.values() if not r.ok]
+    print(f"{len(results) - len(failed)}/{len(results)} jobs succeeded")
+    for r in failed:
+        lines = (r.error or "").strip().splitlines()
+        print(f"  {r.name}: {lines[-1] if lines else 'no error output'}")
+    return results
+
+
+if __name__ == "__main__":
+    import glob
+
+    # Configuration - Change these to your folders
+    log_root = "/home/dhruvkumarjiguda/code/log_parser/2601/App"
+    logs = sorted(glob.glob(os.path.join(log_root, "*", "App.log*")))
+    run_backfill(logs, "backfill", memory_budget=2048 * MB)
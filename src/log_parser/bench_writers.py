@@ -0,0 +1,282 @@
+import filecmp
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from log_parser.report_writer import ReportWriter, format_error_summary, write_records
+from log_parser.test_error_2 import SUMMARY_NAME, _write_namespace_file
+from log_parser.uph_parser import session, write_sessions_to_file
+
+
+def legacy_write_sessions_to_file(sessions, output_file):
+    """The original per-session f-string writer, kept as the baseline"""
+    with open(output_file, "w") as f:
+        for s in sessions:
+            uph_str = f"{s.uph:.2f}" if s.uph is not None else "None"
+            spp_str = (
+                f"{s.seconds_per_pallet:.2f}"
+                if s.seconds_per_pallet is not None
+                else "None"
+            )
+            init_time_str = (
+                f"{s.init_total_time:.2f}" if s.init_total_time is not None else "None"
+            )
+            final_time_str = (
+                f"{s.final_total_time:.2f}"
+                if s.final_total_time is not None
+                else "None"
+            )
+            f.write(
+                f"Session {s.session_id}\n"
+                f"Date: {s.date}\n"
+                f"Start Time: {s.start_time}\n"
+                f"End Time: {s.end_time}\n"
+                f"Pallets Produced: {s.pallets_produced}\n"
+                f"Init Total Time: {init_time_str}\n"
+                f"Final Total Time: {final_time_str}\n"
+                f"UPH: {uph_str}\n"
+                f"Seconds per Pallet: {spp_str}\n"
+                f"Init Rolling UPH: {s.init_rolling_uph}\n"
+                f"Final Rolling UPH: {s.final_rolling_uph}\n"
+                f"{'-' * 40}\n"
+            )
+
+
+def legacy_write_error_files(error_groups, all_namespaces, output_folder):
+    """The original create_separate_error_files writing loop, prints removed"""
+    file_count = 0
+    error_file_count = 0
+    empty_file_count = 0
+    total_errors = 0
+
+    for namespace in sorted(all_namespaces):
+        safe_filename = namespace.replace(".", "_")
+        output_file = os.path.join(output_folder, f"{safe_filename}.txt")
+
+        logs = error_groups.get(namespace, [])
+
+        with open(output_file, "w", encoding="utf-8") as outfile:
+            outfile.write("=" * 100 + "\n")
+            outfile.write(f"ERROR LOGS FOR: {namespace}\n")
+            outfile.write("=" * 100 + "\n")
+
+            if logs:
+                outfile.write(f"Total errors: {len(logs)}\n")
+                outfile.write("=" * 100 + "\n\n")
+
+                for log in logs:
+                    outfile.write(f"{log}\n")
+
+                outfile.write("\n" + "=" * 100 + "\n")
+                outfile.write(f"END OF LOG - Total: {len(logs)} error(s)\n")
+                error_file_count += 1
+                total_errors += len(logs)
+            else:
+                outfile.write(f"Total errors: 0\n")
+                outfile.write("=" * 100 + "\n\n")
+                outfile.write("*** NO ERROR LOGS FOUND FOR THIS NAMESPACE ***\n\n")
+                outfile.write("=" * 100 + "\n")
+                empty_file_count += 1
+
+            outfile.write("=" * 100 + "\n")
+
+        file_count += 1
+
+    summary_file = os.path.join(output_folder, "_SUMMARY.txt")
+    with open(summary_file, "w", encoding="utf-8") as summary:
+        summary.write("=" * 100 + "\n")
+        summary.write("ERROR LOG SUMMARY\n")
+        summary.write("=" * 100 + "\n\n")
+
+        summary.write("NAMESPACES WITH ERRORS:\n")
+        summary.write("-" * 100 + "\n")
+        for namespace in sorted(error_groups.keys()):
+            count = len(error_groups[namespace])
+            summary.write(f"{namespace}\n")
+            summary.write(f"  Count: {count} error(s)\n\n")
+
+        summary.write("\n" + "=" * 100 + "\n\n")
+        summary.write("NAMESPACES WITHOUT ERRORS:\n")
+        summary.write("-" * 100 + "\n")
+        namespaces_without_errors = sorted(all_namespaces - set(error_groups.keys()))
+        if namespaces_without_errors:
+            for namespace in namespaces_without_errors:
+                summary.write(f"{namespace}\n")
+                summary.write(f"  Count: 0 error(s)\n\n")
+        else:
+            summary.write("(None)\n\n")
+
+        summary.write("=" * 100 + "\n")
+        summary.write(f"Total unique namespaces: {file_count}\n")
+        summary.write(f"Namespaces with errors: {error_file_count}\n")
+        summary.write(f"Namespaces without errors: {empty_file_count}\n")
+        summary.write(f"Total error logs: {total_errors}\n")
+        summary.write("=" * 100 + "\n")
+
+
+def make_sessions(n, seed=0):
+    """Generate n synthetic sessions"""
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        pallets = rng.randint(0, 40)
+        spp = rng.uniform(20, 60) if pallets > 1 else None
+        yield session(
+            session_id=i,
+            date="2026-01-24",
+            start_time="08:00:00,000",
+            end_time="09:00:00,000",
+            pallets_produced=pallets,
+            init_total_time=rng.uniform(0, 1000),
+            final_total_time=rng.uniform(1000, 5000),
+            uph=3600 / spp if spp else None,
+            seconds_per_pallet=spp,
+            init_rolling_uph=rng.randint(50, 120),
+            final_rolling_uph=rng.randint(50, 120),
+        )
+
+
+def make_error_groups(n, namespaces=50, seed=0):
+    """Generate n synthetic error lines spread over a few namespaces"""
+    rng = random.Random(seed)
+    groups = {}
+    for i in range(n):
+        ns = f"Services.Namespace{rng.randrange(namespaces)}"
+        groups.setdefault(ns, []).append(
+            f"2026-01-24 08:00:{i % 60:02d},000 [7] ERROR {ns} - "
+            f"Failed to write DO channel {rng.choice((8, 9))}"
+        )
+    return groups
+
+
+def buffered_write_error_files(
+    error_groups, all_namespaces, output_folder, workers=1
+):
+    """The current create_separate_error_files writing path"""
+    namespaces = sorted(all_namespaces)
+
+    def write(namespace):
+        logs = error_groups.get(namespace, [])
+        _write_namespace_file(output_folder, namespace, logs)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write, namespaces))
+    else:
+        for namespace in namespaces:
+            write(namespace)
+
+    error_counts = {ns: len(logs) for ns, logs in error_groups.items()}
+    with ReportWriter(os.path.join(output_folder, SUMMARY_NAME)) as summary:
+        summary.write(format_error_summary(error_counts, all_namespaces))
+
+
+def _same_files(left, right):
+    """True when both folders hold the same files with the same bytes"""
+    names = sorted(os.listdir(left))
+    if names != sorted(os.listdir(right)):
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(left, right, names, shallow=False)
+    return not mismatch and not errors
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark(n_sessions=500_000, n_errors=1_000_000):
+    """
+    Time the legacy writers against the buffered report writers. Session
+    text is expected to tie with the legacy writer (the time is in the
+    formatting); the error files are where buffering and threads help.
+    """
+    sessions = list(make_sessions(n_sessions))
+    error_groups = make_error_groups(n_errors)
+    # A few namespaces that only log INFO get the empty-file layout
+    all_namespaces = set(error_groups) | {f"Services.Idle{i}" for i in range(10)}
+    error_records = [
+        {"namespace": ns, "line": line}
+        for ns, lines in error_groups.items()
+        for line in lines
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        def out(name):
+            return os.path.join(tmp, name)
+
+        for folder in ("legacy_errors", "buffered_errors", "threaded_errors"):
+            os.makedirs(out(folder))
+
+        results = [
+            (
+                "sessions legacy text",
+                _time(legacy_write_sessions_to_file, sessions, out("a.txt")),
+            ),
+            (
+                "sessions buffered text",
+                _time(write_sessions_to_file, sessions, out("b.txt")),
+            ),
+            (
+                "sessions buffered jsonl",
+                _time(write_sessions_to_file, sessions, out("b.jsonl")),
+            ),
+            (
+                "sessions buffered csv",
+                _time(write_sessions_to_file, sessions, out("b.csv")),
+            ),
+            (
+                "errors legacy files",
+                _time(
+                    legacy_write_error_files,
+                    error_groups,
+                    all_namespaces,
+                    out("legacy_errors"),
+                ),
+            ),
+            (
+                "errors buffered files",
+                _time(
+                    buffered_write_error_files,
+                    error_groups,
+                    all_namespaces,
+                    out("buffered_errors"),
+                ),
+            ),
+            (
+                "errors buffered files x8",
+                _time(
+                    buffered_write_error_files,
+                    error_groups,
+                    all_namespaces,
+                    out("threaded_errors"),
+                    8,
+                ),
+            ),
+            (
+                "errors buffered jsonl",
+                _time(write_records, error_records, out("e.jsonl"), "jsonl"),
+            ),
+        ]
+        # The timings only mean something if every path wrote the same bytes
+        for folder in ("buffered_errors", "threaded_errors"):
+            if not _same_files(out("legacy_errors"), out(folder)):
+                raise AssertionError(f"{folder} differs from the legacy output")
+        with open(out("a.txt"), "rb") as a, open(out("b.txt"), "rb") as b:
+            if a.read() != b.read():
+                raise AssertionError("buffered session text differs from legacy")
+
+    print("=" * 60)
+    print(f"WRITER BENCHMARK ({n_sessions} sessions, {n_errors} errors)")
+    print("=" * 60)
+    for name, seconds in results:
+        print(f"  {name:<28} {seconds:8.3f}s")
+    print("=" * 60)
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
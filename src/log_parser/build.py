@@ -0,0 +1,365 @@
+"""
+Incremental build of the daily report bundle.
+
+The bundle is a graph of nodes, each turning input files into output files:
+
+    App.log -> sessions -> stats -> report
+                        -> plots
+                        -> comparison (two days)
+    App.log -> errors -> report
+
+A node's fingerprint hashes its name, version and the content digests of
+its inputs (upstream outputs included). A node reruns only when its
+fingerprint differs from the one recorded after its last successful run,
+or when an output is missing. An upstream node that reruns but produces
+identical output therefore does not invalidate anything downstream.
+Independent stale nodes run in parallel worker processes.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Sequence
+
+from log_parser.report_writer import ReportWriter
+from log_parser.session_cache import cached_read_log, file_digest, to_plot_sessions
+from log_parser.uph_parser import PARSER_VERSION, session, write_sessions_to_file
+
+STATE_NAME = ".build_state.json"
+
+
+@dataclass
+class Node:
+    name: str
+    fn: Callable[[List[str], List[str]], None]  # fn(inputs, outputs), top-level
+    inputs: List[str]
+    outputs: List[str]
+    version: str = ""  # bump to force a rebuild when fn's behaviour changes
+
+
+@dataclass
+class BuildReport:
+    ran: List[str] = field(default_factory=list)
+    fresh: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    blocked: List[str] = field(default_factory=list)  # upstream failed
+
+
+def path_digest(path: str) -> str:
+    """Content digest of a file, or of every file under a directory"""
+    if os.path.isfile(path):
+        return file_digest(path)
+    h = hashlib.blake2b(digest_size=20)
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).encode())
+            h.update(file_digest(full).encode())
+    return h.hexdigest()
+
+
+def fingerprint(node: Node) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{node.name}\0{node.version}\0{node.fn.__qualname__}".encode())
+    for path in node.inputs:
+        h.update(path.encode())
+        h.update(path_digest(path).encode() if os.path.exists(path) else b"-")
+    return h.hexdigest()
+
+
+def _run_node(fn, inputs, outputs):
+    for path in outputs:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+    fn(inputs, outputs)
+    missing = [p for p in outputs if not os.path.exists(p)]
+    if missing:
+        raise RuntimeError(f"outputs not written: {', '.join(missing)}")
+
+
+class BuildGraph:
+    def __init__(self, nodes: Sequence[Node], state_file: str):
+        self.nodes = {node.name: node for node in nodes}
+        self.state_file = state_file
+        producers = {}
+        for node in nodes:
+            for path in node.outputs:
+                if path in producers:
+                    raise ValueError(f"{path} is produced by two nodes")
+                producers[path] = node.name
+        self.upstream = {
+            node.name: {producers[p] for p in node.inputs if p in producers}
+            for node in nodes
+        }
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through {name}")
+            visiting.add(name)
+            for up in self.upstream[name]:
+                visit(up)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def _load_state(self) -> Dict[str, str]:
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, str]):
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_file)
+
+    def is_fresh(self, node: Node, state: Dict[str, str], fp: str) -> bool:
+        return state.get(node.name) == fp and all(map(os.path.exists, node.outputs))
+
+    def build(self, workers: int = 4, force: bool = False) -> BuildReport:
+        """Run every stale node, each as soon as its upstream nodes are done"""
+        state = {} if force else self._load_state()
+        report = BuildReport()
+        done = set()
+        pending = set(self.nodes)
+        running = {}  # future -> (name, fingerprint)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                for name in sorted(pending):
+                    ups = self.upstream[name]
+                    if any(u in report.failed or u in report.blocked for u in ups):
+                        pending.discard(name)
+                        report.blocked.append(name)
+                        continue
+                    if not ups <= done:
+                        continue
+                    pending.discard(name)
+                    node = self.nodes[name]
+                    fp = fingerprint(node)
+                    if self.is_fresh(node, state, fp):
+                        report.fresh.append(name)
+                        done.add(name)
+                    else:
+                        future = pool.submit(
+                            _run_node, node.fn, node.inputs, node.outputs
+                        )
+                        running[future] = (name, fp)
+
+                if not running:
+                    # Everything left was just marked fresh or blocked
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, fp = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        report.failed[name] = f"{type(error).__name__}: {error}"
+                        state.pop(name, None)
+                    else:
+                        report.ran.append(name)
+                        state[name] = fp
+                        done.add(name)
+                    self._save_state(state)
+        return report
+
+
+# ============================================================================
+# Daily bundle
+# ============================================================================
+
+
+def _load_jsonl_sessions(path: str) -> List[session]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [session(**json.loads(line)) for line in f if line.strip()]
+
+
+def build_sessions(inputs, outputs):
+    sessions = cached_read_log(inputs[0])
+    for output in outputs:
+        write_sessions_to_file(sessions, output)
+
+
+def build_stats(inputs, outputs):
+    from log_parser.anomaly import detect_anomalies
+
+    sessions = _load_jsonl_sessions(inputs[0])
+    plot_sessions = to_plot_sessions(sessions)
+    uph = [s["uph"] for s in plot_sessions]
+    stats = {
+        "sessions": len(sessions),
+        "productive_sessions": len(plot_sessions),
+        "pallets": sum(s.pallets_produced for s in sessions),
+        "mean_uph": sum(uph) / len(uph) if uph else None,
+        "max_uph": max(uph, default=None),
+        "min_uph": min(uph, default=None),
+        "anomalous_sessions": sorted(detect_anomalies(plot_sessions)),
+    }
+    with open(outputs[0], "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2)
+
+
+def _day_label(path: str) -> str:
+    # Per-day files live in bundle_dir/<day>/
+    return os.path.basename(os.path.dirname(path))
+
+
+def build_plots(inputs, outputs):
+    # matplotlib is only imported by the nodes that draw
+    from log_parser.plots import create_analysis_plots, create_placeholder_plot
+
+    sessions = to_plot_sessions(_load_jsonl_sessions(inputs[0]))
+    title = _day_label(outputs[0])
+    if not sessions:
+        # Still an output, so the node is fresh until the day changes
+        create_placeholder_plot(outputs[0], f"{title}: no productive sessions")
+        return
+    create_analysis_plots(sessions, outputs[0], title)
+
+
+def build_comparison(inputs, outputs):
+    from log_parser.plots import create_placeholder_plot
+    from log_parser.plots_compare import create_uph_comparison
+
+    first, second = (to_plot_sessions(_load_jsonl_sessions(p)) for p in inputs)
+    labels = tuple(_day_label(p) for p in inputs)
+    if not first or not second:
+        empty = ", ".join(day for day, s in zip(labels, (first, second)) if not s)
+        create_placeholder_plot(outputs[0], f"No productive sessions on {empty}")
+        return
+    create_uph_comparison(first, second, outputs[0], labels)
+
+
+def build_errors(inputs, outputs):
+    from log_parser.test_error_2 import create_separate_error_files
+
+    create_separate_error_files(inputs[0], outputs[0])
+
+
+def build_report(inputs, outputs):
+    from log_parser.test_error_2 import SUMMARY_NAME
+
+    stats_file, error_folder = inputs
+    with open(stats_file, "r", encoding="utf-8") as f:
+        stats = json.load(f)
+    with open(os.path.join(error_folder, SUMMARY_NAME), "r", encoding="utf-8") as f:
+        error_summary = f.read()
+    mean = stats["mean_uph"]
+    with ReportWriter(outputs[0]) as out:
+        out.write("=" * 100 + "\n")
+        out.write("DAILY REPORT\n")
+        out.write("=" * 100 + "\n")
+        out.write(f"Sessions: {stats['sessions']} ")
+        out.write(f"({stats['productive_sessions']} productive)\n")
+        out.write(f"Pallets: {stats['pallets']}\n")
+        out.write(f"Mean UPH: {mean:.2f}\n" if mean is not None else "Mean UPH: None\n")
+        anomalies = stats["anomalous_sessions"]
+        out.write(f"Anomalous sessions: {', '.join(map(str, anomalies)) or 'none'}\n\n")
+        out.write(error_summary)
+
+
+def daily_bundle(
+    logs: Mapping[str, str], bundle_dir: str, plots: bool = True
+) -> List[Node]:
+    """
+    Nodes for the daily bundle.
+
+    Args:
+        logs: {day label: App.log path}, in day order
+        bundle_dir: Output root; each day gets a sub-folder
+        plots: Include the matplotlib nodes
+    """
+    nodes = []
+    days = list(logs)
+    for day, log_path in logs.items():
+        out = os.path.join(bundle_dir, day)
+        sessions_txt = os.path.join(out, "sessions.txt")
+        sessions_jsonl = os.path.join(out, "sessions.jsonl")
+        stats = os.path.join(out, "stats.json")
+        errors = os.path.join(out, "error_logs")
+        nodes += [
+            Node(
+                f"sessions/{day}",
+                build_sessions,
+                [log_path],
+                [sessions_txt, sessions_jsonl],
+                version=PARSER_VERSION,
+            ),
+            Node(f"stats/{day}", build_stats, [sessions_jsonl], [stats]),
+            Node(f"errors/{day}", build_errors, [log_path], [errors]),
+            Node(
+                f"report/{day}",
+                build_report,
+                [stats, errors],
+                [os.path.join(out, "report.txt")],
+            ),
+        ]
+        if plots:
+            nodes.append(
+                Node(
+                    f"plots/{day}",
+                    build_plots,
+                    [sessions_jsonl],
+                    [os.path.join(out, "session_analysis.png")],
+                )
+            )
+    if plots and len(days) >= 2:
+        a, b = days[-2], days[-1]
+        nodes.append(
+            Node(
+                f"comparison/{a}_{b}",
+                build_comparison,
+                [
+                    os.path.join(bundle_dir, a, "sessions.jsonl"),
+                    os.path.join(bundle_dir, b, "sessions.jsonl"),
+                ],
+                [os.path.join(bundle_dir, f"uph_comparison_{a}_{b}.png")],
+            )
+        )
+    return nodes
+
+
+def build_bundle(
+    logs: Mapping[str, str],
+    bundle_dir: str = "bundle",
+    workers: int = 4,
+    plots: bool = True,
+    force: bool = False,
+) -> BuildReport:
+    """Bring the bundle up to date and print what happened"""
+    os.makedirs(bundle_dir, exist_ok=True)
+    graph = BuildGraph(
+        daily_bundle(logs, bundle_dir, plots), os.path.join(bundle_dir, STATE_NAME)
+    )
+    report = graph.build(workers=workers, force=force)
+    print(f"Ran {len(report.ran)}, up to date {len(report.fresh)}")
+    for name in report.ran:
+        print(f"  built   {name}")
+    for name, error in report.failed.items():
+        print(f"  FAILED  {name}: {error}")
+    for name in report.blocked:
+        print(f"  skipped {name} (upstream failed)")
+    return report
+
+
+if __name__ == "__main__":
+    # Configuration - Change these to your file names
+    log_root = "/home/dhruvkumarjiguda/code/log_parser/2601/App"
+    daily_logs = {
+        "2026-01-23": f"{log_root}/2026-01-23/App.log",
+        "2026-01-24": f"{log_root}/2026-01-24/App.log",
+    }
+    build_bundle(daily_logs)
@@ -0,0 +1,92 @@
+"""
+Varint codecs shared by the on-disk formats (metric store segments, error
+index posting lists).
+"""
+
+from typing import Iterable, Iterator, List, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Block codec: zigzag varints, first row absolute, later rows as deltas.
+# Every block decodes on its own, so appends never rewrite earlier data.
+# ---------------------------------------------------------------------------
+
+
+def _put_varint(out: bytearray, n: int):
+    n = (n << 1) if n >= 0 else ((-n) << 1) - 1  # zigzag
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            break
+        shift += 7
+    return (n >> 1) ^ -(n & 1), pos
+
+
+def encode_block(rows: List[Tuple[int, ...]], width: int) -> bytes:
+    payload = bytearray()
+    prev = (0,) * width
+    for row in rows:
+        for value, before in zip(row, prev):
+            _put_varint(payload, value - before)
+        prev = row
+    header = bytearray()
+    _put_varint(header, len(rows))
+    _put_varint(header, len(payload))
+    return bytes(header + payload)
+
+
+def decode_blocks(data: bytes, width: int) -> Iterator[Tuple[int, ...]]:
+    pos = 0
+    while pos < len(data):
+        count, pos = _get_varint(data, pos)
+        length, pos = _get_varint(data, pos)
+        end = pos + length
+        prev = [0] * width
+        for _ in range(count):
+            for i in range(width):
+                delta, pos = _get_varint(data, pos)
+                prev[i] += delta
+            yield tuple(prev)
+        pos = end
+
+
+# ---------------------------------------------------------------------------
+# Posting lists: ascending ids as unsigned varint gaps, no header.
+# ---------------------------------------------------------------------------
+
+
+def encode_postings(ids: Iterable[int]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for i in ids:
+        n = i - prev
+        prev = i
+        while n >= 0x80:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> List[int]:
+    ids = []
+    prev = n = shift = 0
+    for b in data:
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            prev += n
+            ids.append(prev)
+            n = shift = 0
+        else:
+            shift += 7
+    return ids
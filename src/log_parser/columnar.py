@@ -0,0 +1,319 @@
+"""
+Session and metric-sample tables as contiguous columns.
+
+Each column is a typed buffer laid out the way Arrow expects it (values,
+an optional LSB-first validity bitmap, int32 offsets + UTF-8 bytes for
+strings), so consumers can wrap it without copying:
+
+    numpy.frombuffer(table["uph"].data, dtype="float64")
+    table.to_arrow()  # pyarrow, when installed
+
+Tables save to a small native .cols file that read_table() memory-maps,
+or to Arrow IPC (.arrow / .feather) and Parquet when pyarrow is available.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from log_parser.correlate import MetricSample, iter_metric_samples
+from log_parser.log_reader import iter_lines
+from log_parser.uph_parser import session
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: Arrow/Parquet export only
+    pa = None
+
+MAGIC = b"LPCOLS1\n"
+ALIGNMENT = 64  # Arrow's recommended buffer alignment
+EPOCH = datetime(1970, 1, 1)
+
+# type name -> array typecode of the value buffer
+TYPECODES = {"int64": "q", "float64": "d", "timestamp_ms": "q", "string": "B"}
+
+SESSION_SCHEMA: List[Tuple[str, str]] = [
+    ("session_id", "int64"),
+    ("date", "string"),
+    ("start_time", "string"),
+    ("end_time", "string"),
+    ("pallets_produced", "int64"),
+    ("init_total_time", "float64"),
+    ("final_total_time", "float64"),
+    ("uph", "float64"),
+    ("seconds_per_pallet", "float64"),
+    ("init_rolling_uph", "int64"),
+    ("final_rolling_uph", "int64"),
+    ("end_date", "string"),
+]
+
+SAMPLE_SCHEMA: List[Tuple[str, str]] = [
+    ("timestamp", "timestamp_ms"),
+    ("total_units", "int64"),
+    ("rolling_uph", "int64"),
+    ("total_time", "float64"),
+]
+
+Buffer = Union[array, memoryview]
+
+
+@dataclass
+class Column:
+    type: str
+    length: int
+    data: Buffer  # values, or UTF-8 bytes for strings
+    offsets: Optional[Buffer] = None  # strings only: length + 1 int32 offsets
+    validity: Optional[Buffer] = None  # None when there are no nulls
+
+    def __len__(self) -> int:
+        return self.length
+
+    def is_valid(self, i: int) -> bool:
+        return self.validity is None or bool(self.validity[i >> 3] & (1 << (i & 7)))
+
+    def __getitem__(self, i: int):
+        if not self.is_valid(i):
+            return None
+        if self.type == "string":
+            return bytes(self.data[self.offsets[i] : self.offsets[i + 1]]).decode()
+        if self.type == "timestamp_ms":
+            return EPOCH + timedelta(milliseconds=self.data[i])
+        return self.data[i]
+
+    def to_list(self) -> list:
+        return [self[i] for i in range(self.length)]
+
+    def buffers(self) -> List[Optional[memoryview]]:
+        """Arrow buffer order: validity, [offsets,] data"""
+        out = [memoryview(self.validity) if self.validity is not None else None]
+        if self.offsets is not None:
+            out.append(memoryview(self.offsets))
+        out.append(memoryview(self.data))
+        return out
+
+
+def build_column(type_name: str, values: Sequence) -> Column:
+    """Copy Python values into a column once; None becomes a null"""
+    n = len(values)
+    validity = bytearray((n + 7) // 8)
+    has_nulls = False
+    if type_name == "string":
+        offsets = array("i", [0])
+        data = bytearray()
+        for i, value in enumerate(values):
+            if value is None:
+                has_nulls = True
+            else:
+                data += value.encode()
+                validity[i >> 3] |= 1 << (i & 7)
+            offsets.append(len(data))
+        column = Column(type_name, n, array("B", data), offsets=offsets)
+    else:
+        data = array(TYPECODES[type_name], bytes(8 * n))
+        for i, value in enumerate(values):
+            if value is None:
+                has_nulls = True
+                continue
+            if type_name == "timestamp_ms":
+                value = (value - EPOCH) // timedelta(milliseconds=1)
+            data[i] = value
+            validity[i >> 3] |= 1 << (i & 7)
+        column = Column(type_name, n, data)
+    if has_nulls:
+        column.validity = validity
+    return column
+
+
+class ColumnTable:
+    def __init__(self, columns: Dict[str, Column]):
+        self.columns = columns
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        self.num_rows = lengths.pop() if lengths else 0
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable, schema: Sequence[Tuple[str, str]]
+    ) -> "ColumnTable":
+        records = list(records)
+        return cls(
+            {
+                name: build_column(type_name, [getattr(r, name) for r in records])
+                for name, type_name in schema
+            }
+        )
+
+    def to_dicts(self) -> List[dict]:
+        lists = {name: c.to_list() for name, c in self.columns.items()}
+        return [
+            {name: values[i] for name, values in lists.items()}
+            for i in range(self.num_rows)
+        ]
+
+    def to_arrow(self):
+        """pyarrow.Table sharing this table's buffers"""
+        if pa is None:
+            raise ImportError("pyarrow is required for Arrow export")
+        arrow_types = {
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "timestamp_ms": pa.timestamp("ms"),
+            "string": pa.string(),
+        }
+        arrays = []
+        for column in self.columns.values():
+            buffers = [
+                pa.py_buffer(b) if b is not None else None for b in column.buffers()
+            ]
+            arrays.append(
+                pa.Array.from_buffers(
+                    arrow_types[column.type], column.length, buffers
+                )
+            )
+        return pa.Table.from_arrays(arrays, names=list(self.columns))
+
+
+def sessions_table(sessions: Iterable[session]) -> ColumnTable:
+    return ColumnTable.from_records(sessions, SESSION_SCHEMA)
+
+
+def samples_table(samples: Iterable[MetricSample]) -> ColumnTable:
+    return ColumnTable.from_records(samples, SAMPLE_SCHEMA)
+
+
+def log_samples_table(file_path: str) -> ColumnTable:
+    return samples_table(iter_metric_samples(iter_lines(file_path)))
+
+
+# ============================================================================
+# Files
+# ============================================================================
+
+
+def _pad(f, position: int) -> int:
+    padding = -position % ALIGNMENT
+    f.write(b"\0" * padding)
+    return position + padding
+
+
+def _write_native(table: ColumnTable, output_file: str):
+    # Header: magic, u64 JSON length, JSON; then 64-byte aligned buffers
+    # with offsets relative to the start of the buffer area
+    layout = []
+    position = 0
+    for name, column in table.columns.items():
+        entry = {"name": name, "type": column.type, "length": column.length}
+        for part, buf in zip(("validity", "offsets", "data"), _named_buffers(column)):
+            if buf is None:
+                continue
+            position += -position % ALIGNMENT
+            entry[part] = [position, buf.nbytes]
+            position += buf.nbytes
+        layout.append(entry)
+    header = json.dumps({"num_rows": table.num_rows, "columns": layout}).encode()
+
+    with open(output_file, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        start = _pad(f, len(MAGIC) + 8 + len(header))
+        position = 0
+        for column in table.columns.values():
+            for buf in _named_buffers(column):
+                if buf is None:
+                    continue
+                position = _pad(f, start + position) - start
+                f.write(buf)
+                position += buf.nbytes
+
+
+def _named_buffers(column: Column) -> List[Optional[memoryview]]:
+    return [
+        memoryview(column.validity) if column.validity is not None else None,
+        memoryview(column.offsets) if column.offsets is not None else None,
+        memoryview(column.data),
+    ]
+
+
+def _read_native(input_file: str) -> ColumnTable:
+    with open(input_file, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    if view[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{input_file} is not a column file")
+    (header_len,) = struct.unpack_from("<Q", view, len(MAGIC))
+    header_end = len(MAGIC) + 8 + header_len
+    header = json.loads(bytes(view[len(MAGIC) + 8 : header_end]))
+    start = header_end + (-header_end % ALIGNMENT)
+
+    def part(entry, name, typecode):
+        if name not in entry:
+            return None
+        offset, nbytes = entry[name]
+        return view[start + offset : start + offset + nbytes].cast(typecode)
+
+    columns = {}
+    for entry in header["columns"]:
+        columns[entry["name"]] = Column(
+            entry["type"],
+            entry["length"],
+            part(entry, "data", TYPECODES[entry["type"]]),
+            offsets=part(entry, "offsets", "i"),
+            validity=part(entry, "validity", "B"),
+        )
+    return ColumnTable(columns)
+
+
+def write_table(table: ColumnTable, output_file: str):
+    """.arrow/.feather (Arrow IPC) and .parquet need pyarrow; anything else is .cols"""
+    ext = os.path.splitext(output_file)[1].lower()
+    if ext in (".arrow", ".feather", ".parquet"):
+        arrow_table = table.to_arrow()
+        if ext == ".parquet":
+            pyarrow.parquet.write_table(arrow_table, output_file)
+        else:
+            with pyarrow.ipc.new_file(output_file, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        return
+    _write_native(table, output_file)
+
+
+def read_table(input_file: str):
+    """
+    Memory-mapped load: a ColumnTable for .cols files, a pyarrow.Table for
+    Arrow IPC files. Nothing is parsed or copied until values are touched.
+    """
+    ext = os.path.splitext(input_file)[1].lower()
+    if ext in (".arrow", ".feather"):
+        if pa is None:
+            raise ImportError("pyarrow is required to read Arrow files")
+        return pyarrow.ipc.open_file(pa.memory_map(input_file)).read_all()
+    if ext == ".parquet":
+        if pa is None:
+            raise ImportError("pyarrow is required to read Parquet files")
+        return pyarrow.parquet.read_table(input_file, memory_map=True)
+    return _read_native(input_file)
+
+
+if __name__ == "__main__":
+    from log_parser.session_cache import cached_read_log
+
+    # Configuration - Change these to your file names
+    input_log = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log"
+    ext = ".arrow" if pa is not None else ".cols"
+
+    write_table(sessions_table(cached_read_log(input_log)), "sessions" + ext)
+    write_table(log_samples_table(input_log), "samples" + ext)
+    print(f"Wrote sessions{ext} and samples{ext}")
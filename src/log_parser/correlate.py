@@ -0,0 +1,393 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from log_parser.log_reader import iter_lines, read_records
+from log_parser.report_writer import ReportWriter
+from log_parser.session_state import SessionStateMachine
+from log_parser.uph_parser import METRICS_RE, TIMESTAMP_RE, session
+
+ERROR_LINE_RE = re.compile(
+    r"^(?P<date>\d{4}-\d{2}-\d{2})\s+"
+    r"(?P<time>\d{2}:\d{2}:\d{2},\d{3})\s+"
+    r"\[\d+\]\s+ERROR\s+(?P<namespace>[\w\.]+)\s+-\s*(?P<message>.*)$"
+)
+
+# Lines handed to the session, sample and error extractors at a time
+BATCH_LINES = 8192
+
+# Numbers inside messages ("DO channel 8", "port 502") collapse into one template
+NUMBER_RE = re.compile(r"\d+")
+
+
+@dataclass
+class ErrorEvent:
+    timestamp: datetime
+    namespace: str
+    template: str
+    line: str
+
+
+@dataclass
+class MetricSample:
+    timestamp: datetime
+    total_units: int
+    rolling_uph: int
+    total_time: float
+
+
+@dataclass
+class SessionErrors:
+    session_id: int
+    start: datetime
+    end: datetime
+    uph: Optional[float]
+    counts: Counter = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def parse_timestamp(date: str, time: str) -> datetime:
+    return datetime.fromisoformat(f"{date} {time.replace(',', '.')}")
+
+
+def message_template(message: str) -> str:
+    return NUMBER_RE.sub("<n>", message.strip())
+
+
+def iter_error_events(lines: Iterable[str]) -> Iterator[ErrorEvent]:
+    """Yield ERROR lines in file order as timestamped events"""
+    for line in lines:
+        if "ERROR" not in line:
+            continue
+        m = ERROR_LINE_RE.match(line)
+        if m:
+            yield ErrorEvent(
+                timestamp=parse_timestamp(m["date"], m["time"]),
+                namespace=m["namespace"],
+                template=message_template(m["message"]),
+                line=line.rstrip("\n"),
+            )
+
+
+def iter_metric_samples(lines: Iterable[str]) -> Iterator[MetricSample]:
+    """Yield every TotalUnits / Rolling UPH / TotalTime line with its timestamp"""
+    for line in lines:
+        if "TotalUnits" not in line:
+            continue
+        ts = TIMESTAMP_RE.match(line)
+        metrics = METRICS_RE.search(line)
+        if ts and metrics:
+            yield MetricSample(
+                timestamp=parse_timestamp(ts["date"], ts["time"]),
+                total_units=int(metrics["total_units"]),
+                rolling_uph=int(metrics["rolling_uph"]),
+                total_time=float(metrics["total_time"]),
+            )
+
+
+def merge_sorted(*streams: Iterable, key=lambda e: e.timestamp) -> Iterator:
+    """k-way merge of already time-ordered streams (e.g. one per daily log)"""
+    return heapq.merge(*streams, key=key)
+
+
+def session_bounds(s: session) -> Tuple[datetime, datetime]:
+    """Session start/end as datetimes; an end before the start rolls past midnight"""
+    start = parse_timestamp(s.date, s.start_time)
+    if not s.end_time:
+        return start, start
+    end = parse_timestamp(s.end_date or s.date, s.end_time)
+    if end < start:
+        end += timedelta(days=1)
+    return start, end
+
+
+def error_key(event: ErrorEvent, by: str) -> str:
+    if by == "namespace":
+        return event.namespace
+    if by == "template":
+        return event.template
+    return f"{event.namespace}: {event.template}"
+
+
+class SessionErrorJoin:
+    """
+    Incremental form of join_errors_to_sessions: add events as they are
+    read, close sessions in order. Only events newer than the last closed
+    session are held, and release() drops those no session can claim.
+    """
+
+    def __init__(self, by: str = "both"):
+        self.by = by
+        self._events: deque = deque()
+
+    def add_event(self, event: ErrorEvent):
+        self._events.append(event)
+
+    def release(self, open_start: Optional[datetime]):
+        """
+        Drop events before the open session's start. With no session open,
+        keep only the newest timestamp's events, which a session starting
+        at that same moment could still claim.
+        """
+        events = self._events
+        if not events:
+            return
+        cutoff = open_start if open_start is not None else events[-1].timestamp
+        while events and events[0].timestamp < cutoff:
+            events.popleft()
+
+    def close(self, s: session) -> SessionErrors:
+        """Row for a session; every event before its end must be added first"""
+        start, end = session_bounds(s)
+        row = SessionErrors(s.session_id, start, end, s.uph)
+        events = self._events
+        # Skip events that fell between sessions (or before the first one)
+        while events and events[0].timestamp < start:
+            events.popleft()
+        while events and events[0].timestamp < end:
+            row.counts[error_key(events.popleft(), self.by)] += 1
+        return row
+
+
+def join_errors_to_sessions(
+    sessions: Iterable[session], events: Iterable[ErrorEvent], by: str = "both"
+) -> List[SessionErrors]:
+    """
+    Count errors inside each session's [start, end) range.
+
+    Both inputs must be in time order; the join is a single merge sweep, so
+    months of data cost O(sessions + events).
+    """
+    join = SessionErrorJoin(by)
+    results = []
+    events = iter(events)
+    pending = next(events, None)
+    for s in sessions:
+        _, end = session_bounds(s)
+        while pending is not None and pending.timestamp < end:
+            join.add_event(pending)
+            pending = next(events, None)
+        results.append(join.close(s))
+    return results
+
+
+def join_errors_to_samples(
+    samples: Iterable[MetricSample], events: Iterable[ErrorEvent], by: str = "both"
+) -> Iterator[Tuple[MetricSample, Counter]]:
+    """Pair each metric sample with the errors logged since the previous sample"""
+    events = iter(events)
+    pending = next(events, None)
+    for sample in samples:
+        counts = Counter()
+        while pending is not None and pending.timestamp <= sample.timestamp:
+            counts[error_key(pending, by)] += 1
+            pending = next(events, None)
+        yield sample, counts
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _bucket(ts: datetime, bucket_seconds: int) -> int:
+    # Local wall-clock time, so hour buckets start on the hour in any timezone
+    return (ts - _EPOCH) // timedelta(seconds=bucket_seconds)
+
+
+class BucketSeries:
+    """Incremental form of bucket_series: add samples and events in any mix"""
+
+    def __init__(self, bucket_seconds: int = 300, by: str = "both"):
+        self.bucket_seconds = bucket_seconds
+        self.by = by
+        self.units: Dict[int, int] = defaultdict(int)
+        self.errors: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.first: Optional[int] = None
+        self.last: Optional[int] = None
+        self._last_units: Optional[int] = None
+
+    def add_sample(self, sample: MetricSample):
+        b = _bucket(sample.timestamp, self.bucket_seconds)
+        self.first = b if self.first is None else self.first
+        self.last = b
+        # Counter resets (restarts) contribute nothing rather than a negative delta
+        if self._last_units is not None and sample.total_units >= self._last_units:
+            self.units[b] += sample.total_units - self._last_units
+        self._last_units = sample.total_units
+
+    def add_event(self, event: ErrorEvent):
+        # Kept per bucket; trimmed to the sampled range in result()
+        b = _bucket(event.timestamp, self.bucket_seconds)
+        self.errors[error_key(event, self.by)][b] += 1
+
+    def result(self) -> Tuple[List[int], List[float], Dict[str, List[int]]]:
+        if self.first is None:
+            return [], [], {}
+        buckets = list(range(self.first, self.last + 1))
+        scale = 3600 / self.bucket_seconds
+        uph = [self.units.get(b, 0) * scale for b in buckets]
+        error_series = {}
+        for key, counts in self.errors.items():
+            if any(self.first <= b <= self.last for b in counts):
+                error_series[key] = [counts.get(b, 0) for b in buckets]
+        return buckets, uph, error_series
+
+
+def bucket_series(
+    samples: Iterable[MetricSample],
+    events: Iterable[ErrorEvent],
+    bucket_seconds: int = 300,
+    by: str = "both",
+) -> Tuple[List[int], List[float], Dict[str, List[int]]]:
+    """
+    Align production and errors on a fixed time grid.
+
+    Returns:
+        (bucket ids, UPH per bucket, error counts per key per bucket)
+    """
+    series = BucketSeries(bucket_seconds, by)
+    for sample in samples:
+        series.add_sample(sample)
+    for event in events:
+        series.add_event(event)
+    return series.result()
+
+
+def pearson(xs: List[float], ys: List[float]) -> Optional[float]:
+    n = len(xs)
+    if n < 3:
+        return None
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    cov = var_x = var_y = 0.0
+    for x, y in zip(xs, ys):
+        dx = x - mean_x
+        dy = y - mean_y
+        cov += dx * dy
+        var_x += dx * dx
+        var_y += dy * dy
+    if var_x == 0 or var_y == 0:
+        return None
+    return cov / math.sqrt(var_x * var_y)
+
+
+def lagged_correlation(
+    errors: List[int], uph: List[float], max_lag: int = 6
+) -> List[Tuple[int, Optional[float]]]:
+    """Correlation of error counts at t with UPH at t + lag buckets"""
+    results = []
+    for lag in range(max_lag + 1):
+        xs = errors[: len(errors) - lag] if lag else errors
+        results.append((lag, pearson(xs, uph[lag:])))
+    return results
+
+
+def write_correlation_report(
+    session_rows: List[SessionErrors],
+    error_series: Dict[str, List[int]],
+    uph: List[float],
+    output_file: str,
+    bucket_seconds: int = 300,
+    max_lag: int = 6,
+    top: int = 20,
+):
+    """Write per-session error counts and lagged correlations for the top keys"""
+    with ReportWriter(output_file) as out:
+        out.write("=" * 100 + "\n")
+        out.write("ERRORS PER SESSION\n")
+        out.write("=" * 100 + "\n")
+        for row in session_rows:
+            uph_str = f"{row.uph:.2f}" if row.uph is not None else "None"
+            out.write(
+                f"Session {row.session_id} {row.start:%Y-%m-%d %H:%M:%S} - "
+                f"{row.end:%H:%M:%S}  UPH: {uph_str}  Errors: {row.total}\n"
+            )
+            for key, count in row.counts.most_common():
+                out.write(f"    {count:6d}  {key}\n")
+
+        out.write("\n" + "=" * 100 + "\n")
+        out.write(f"LAGGED CORRELATION (errors -> UPH, {bucket_seconds}s buckets)\n")
+        out.write("=" * 100 + "\n")
+        ranked = sorted(error_series.items(), key=lambda kv: -sum(kv[1]))[:top]
+        for key, series in ranked:
+            out.write(f"{key}  (total {sum(series)})\n")
+            for lag, r in lagged_correlation(series, uph, max_lag):
+                r_str = f"{r:+.3f}" if r is not None else "n/a"
+                out.write(f"  lag {lag * bucket_seconds:>6d}s  r = {r_str}\n")
+            out.write("\n")
+
+
+def _batches(lines: Iterable[str], size: int = BATCH_LINES) -> Iterator[List[str]]:
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def merged_lines(log_files: Sequence[str]) -> Iterator[str]:
+    """Lines of several time-ordered logs (e.g. consecutive days) in time order"""
+    if len(log_files) == 1:
+        yield from iter_lines(log_files[0])
+        return
+    streams = [read_records(path) for path in log_files]
+    for record in merge_sorted(*streams, key=lambda r: (r.date or "", r.time or "")):
+        yield record.line + "\n"
+        for line in record.continuation:
+            yield line + "\n"
+
+
+def correlate_log(
+    log_files: Union[str, Sequence[str]],
+    output_file: str = "error_uph_correlation.txt",
+    bucket_seconds: int = 300,
+    max_lag: int = 6,
+    by: str = "both",
+):
+    """
+    Sessions, samples and errors from one read of the log(s), then the
+    report. Lines are streamed in batches; only the open session's errors,
+    the per-session rows and the per-bucket counts are kept.
+    """
+    if isinstance(log_files, str):
+        log_files = [log_files]
+    machine = SessionStateMachine(legacy=True)  # read_log semantics
+    join = SessionErrorJoin(by)
+    series = BucketSeries(bucket_seconds, by)
+    session_rows = []
+
+    for batch in _batches(merged_lines(log_files)):
+        for event in iter_error_events(batch):
+            join.add_event(event)
+            series.add_event(event)
+        for sample in iter_metric_samples(batch):
+            series.add_sample(sample)
+        # Sessions close at the next init, after all of their errors were added
+        for s in machine.feed(batch):
+            session_rows.append(join.close(s))
+        start = machine.open_start
+        join.release(parse_timestamp(*start) if start else None)
+    for s in machine.finish():
+        session_rows.append(join.close(s))
+
+    _, uph, error_series = series.result()
+    write_correlation_report(
+        session_rows, error_series, uph, output_file, bucket_seconds, max_lag
+    )
+    print(f"Correlation report written to {output_file}")
+
+
+if __name__ == "__main__":
+    # Configuration - Change these to your file names
+    input_log = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log"
+
+    correlate_log(input_log)
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from log_parser.correlate import iter_error_events, iter_metric_samples
+from log_parser.log_reader import iter_lines
+from log_parser.report_writer import record_to_dict
+from log_parser.session_cache import cache_key, cached_read_log
+from log_parser.timeline import source_names
+
+# ============================================================================
+# EDIT THESE - logs served by the dashboard
+# ============================================================================
+LOG_PATHS = [
+    "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-23/App.log",
+    "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log",
+]
+# Loopback only by default: the API has no authentication. Set HOST to
+# "0.0.0.0" (or pass host=) to serve other machines on the network.
+HOST = "127.0.0.1"
+PORT = 8050
+# ============================================================================
+
+
+def sessions_payload(log_path: str) -> List[dict]:
+    return [record_to_dict(s) for s in cached_read_log(log_path)]
+
+
+def hourly_payload(log_path: str) -> List[dict]:
+    """Per-hour sessions, pallets and mean UPH"""
+    hours: Dict[Tuple[str, str], dict] = {}
+    for s in cached_read_log(log_path):
+        hour = (s.date, s.start_time[:2])
+        row = hours.setdefault(
+            hour,
+            {
+                "date": s.date,
+                "hour": int(hour[1]),
+                "sessions": 0,
+                "pallets": 0,
+                "uph": [],
+            },
+        )
+        row["sessions"] += 1
+        row["pallets"] += s.pallets_produced
+        if s.uph is not None:
+            row["uph"].append(s.uph)
+    payload = []
+    for row in hours.values():
+        uph = row.pop("uph")
+        row["mean_uph"] = sum(uph) / len(uph) if uph else None
+        payload.append(row)
+    return payload
+
+
+def errors_payload(log_path: str) -> List[dict]:
+    """Error counts by namespace and message template"""
+    counts = Counter(
+        (e.namespace, e.template) for e in iter_error_events(iter_lines(log_path))
+    )
+    return [
+        {"namespace": ns, "template": template, "count": count}
+        for (ns, template), count in counts.most_common()
+    ]
+
+
+def rolling_uph_payload(log_path: str) -> List[dict]:
+    """Every Rolling UPH sample with its timestamp"""
+    return [
+        {
+            "timestamp": sample.timestamp.isoformat(),
+            "total_units": sample.total_units,
+            "rolling_uph": sample.rolling_uph,
+        }
+        for sample in iter_metric_samples(iter_lines(log_path))
+    ]
+
+
+ENDPOINTS: Dict[str, Callable[[str], List[dict]]] = {
+    "sessions": sessions_payload,
+    "hourly": hourly_payload,
+    "errors": errors_payload,
+    "rolling_uph": rolling_uph_payload,
+}
+
+
+class ResponseCache:
+    """
+    Encoded JSON bodies keyed by (endpoint, log). Each entry remembers the
+    content key of the log it was built from, so appending to a log
+    (new data ingested) invalidates exactly the responses built from it.
+    """
+
+    def __init__(self, log_paths: Sequence[str]):
+        self.logs = source_names(log_paths)
+        self._entries: Dict[Tuple[str, str], Tuple[str, bytes, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, endpoint: str, log_name: str
+    ) -> Optional[Tuple[bytes, str, float]]:
+        """Returns (body, etag, last_modified) or None for unknown names"""
+        log_path = self.logs.get(log_name)
+        if endpoint not in ENDPOINTS or log_path is None:
+            return None
+
+        content_key = cache_key([log_path])
+        with self._lock:
+            entry = self._entries.get((endpoint, log_name))
+            if entry and entry[0] == content_key:
+                return entry[1], entry[2], entry[3]
+
+        body = json.dumps(ENDPOINTS[endpoint](log_path), separators=(",", ":"))
+        body = body.encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        mtime = os.path.getmtime(log_path)
+        with self._lock:
+            self._entries[(endpoint, log_name)] = (content_key, body, etag, mtime)
+        return body, etag, mtime
+
+    def invalidate(self, log_name: Optional[str] = None):
+        with self._lock:
+            if log_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[1] == log_name]:
+                    del self._entries[key]
+
+    def warm(self):
+        """Build every endpoint up front so the first viewers don't wait"""
+        for log_name in self.logs:
+            for endpoint in ENDPOINTS:
+                self.get(endpoint, log_name)
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    cache: ResponseCache = None  # set by serve()
+
+    def _send_json(self, status: int, body, headers: Optional[dict] = None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+
+        # /api/logs -> available log names and endpoints
+        if parts == ["api", "logs"]:
+            self._send_json(
+                200, {"logs": sorted(self.cache.logs), "endpoints": sorted(ENDPOINTS)}
+            )
+            return
+
+        # /api/<log>/<endpoint>; log names may contain "/" (App/2026-01-24)
+        if len(parts) < 3 or parts[0] != "api":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        result = self.cache.get(parts[-1], "/".join(parts[1:-1]))
+        if result is None:
+            self._send_json(404, {"error": "unknown log or endpoint"})
+            return
+        body, etag, mtime = result
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(mtime, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        not_modified = False
+        if if_none_match is not None:
+            not_modified = etag in [t.strip() for t in if_none_match.split(",")]
+        elif if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+                not_modified = int(mtime) <= since
+            except (TypeError, ValueError):
+                pass
+
+        if not_modified:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self._send_json(200, body, headers)
+
+    def log_message(self, format, *args):
+        # Keep the console quiet; one line per request is too chatty
+        pass
+
+
+def serve(log_paths: Sequence[str] = LOG_PATHS, host: str = HOST, port: int = PORT):
+    """Serve session/hourly/error/rolling-UPH JSON for the given logs"""
+    log_paths = [p for p in log_paths if os.path.exists(p)]
+    cache = ResponseCache(log_paths)
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        print(f"Warning: serving unauthenticated log data on {host}")
+    print(f"Preparing {len(log_paths)} log(s)...")
+    cache.warm()
+
+    handler = type("Handler", (DashboardHandler,), {"cache": cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Dashboard API on http://{host}:{port}/api/logs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,256 @@
+"""
+Trigram index over error records.
+
+Every error record (stack trace included) is a document. The index maps
+each lowercase trigram to the sorted ids of the documents containing it,
+so a query only verifies documents that contain every trigram of its
+literal text. Lowercasing keeps one index usable for case-sensitive and
+case-insensitive queries; the final check is always against the real text.
+
+File layout (.idx): magic, u32 header length, JSON header (namespaces,
+document count, trigram -> [offset, length] of its posting list, and
+[offset, length] of every document block), the varint-gap posting lists,
+then the documents in zlib-compressed blocks of DOC_BLOCK. The file is
+memory-mapped; a query reads only the posting lists of its trigrams and
+decompresses only the blocks holding candidate documents.
+"""
+
+import json
+import mmap
+import re
+import struct
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from log_parser.codec import decode_postings, encode_postings
+from log_parser.log_reader import read_records
+from log_parser.rules import guess_literal
+
+MAGIC = b"LPTRI2\n"
+INDEX_NAME = "_ERRORS.idx"
+
+DOC_BLOCK = 64  # documents per compressed block
+# Checking a candidate costs about as much as decoding this many posting
+# bytes; intersecting stops when the next list costs more than checking
+CHECK_COST = 100
+
+
+@dataclass
+class Hit:
+    namespace: str
+    text: str
+
+
+def trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ErrorIndex:
+    def __init__(self):
+        self.namespaces: List[str] = []
+        self.doc_count = 0
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._encoded: Dict[str, Tuple[int, int]] = {}  # loaded: tri -> (offset, len)
+        self._blocks: List[Tuple[int, int]] = []  # loaded: doc block -> (offset, len)
+        self._data = b""  # loaded: the mapped file
+        self._docs: List[Tuple[int, str]] = []  # built in memory
+        self._decoded: Dict[int, List[Tuple[int, str]]] = {}  # loaded blocks
+        self._ns_ids: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------ build
+
+    def add(self, namespace: str, text: str):
+        ns_id = self._ns_ids.get(namespace)
+        if ns_id is None:
+            ns_id = self._ns_ids[namespace] = len(self.namespaces)
+            self.namespaces.append(namespace)
+        doc_id = self.doc_count
+        self.doc_count += 1
+        self._docs.append((ns_id, text))
+        postings = self._postings
+        for tri in trigrams(text):
+            postings[tri].append(doc_id)
+
+    @classmethod
+    def from_groups(cls, error_groups: Dict[str, List[str]]) -> "ErrorIndex":
+        """Index the namespace -> error texts mapping the splitter builds"""
+        index = cls()
+        for namespace in sorted(error_groups):
+            for text in error_groups[namespace]:
+                index.add(namespace, text)
+        return index
+
+    @classmethod
+    def from_log(cls, file_path: str) -> "ErrorIndex":
+        """Index the ERROR records of a raw log"""
+        index = cls()
+        for record in read_records(file_path):
+            if record.level == "ERROR" and record.namespace:
+                index.add(record.namespace, record.text.strip())
+        return index
+
+    # ------------------------------------------------------------------ files
+
+    def save(self, output_file: str):
+        table = {}
+        blob = bytearray()
+        for tri in sorted(self._all_trigrams()):
+            encoded = encode_postings(self._posting(tri))
+            table[tri] = [len(blob), len(encoded)]
+            blob += encoded
+        blocks = []
+        docs = bytearray()
+        for start in range(0, self.doc_count, DOC_BLOCK):
+            ids = range(start, min(start + DOC_BLOCK, self.doc_count))
+            block = zlib.compress(
+                json.dumps([self._document(i) for i in ids], separators=(",", ":"))
+                .encode("utf-8")
+            )
+            blocks.append([len(docs), len(block)])
+            docs += block
+        header = json.dumps(
+            {
+                "namespaces": self.namespaces,
+                "doc_count": self.doc_count,
+                "trigrams": table,
+                "blocks": blocks,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        with open(output_file, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            f.write(blob)
+            f.write(docs)
+
+    @classmethod
+    def load(cls, input_file: str) -> "ErrorIndex":
+        with open(input_file, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{input_file} is not an error index")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len))
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        pos = len(MAGIC) + 4 + header_len
+        blob_len = sum(length for _, length in header["trigrams"].values())
+
+        index = cls()
+        index.namespaces = header["namespaces"]
+        index.doc_count = header["doc_count"]
+        index._encoded = {
+            tri: (pos + offset, length)
+            for tri, (offset, length) in header["trigrams"].items()
+        }
+        index._blocks = [
+            (pos + blob_len + offset, length) for offset, length in header["blocks"]
+        ]
+        index._data = data
+        index._docs = []
+        return index
+
+    def _all_trigrams(self):
+        return self._postings.keys() | self._encoded.keys()
+
+    def _posting(self, tri: str) -> List[int]:
+        if tri in self._postings:
+            return self._postings[tri]
+        entry = self._encoded.get(tri)
+        if entry is None:
+            return []
+        offset, length = entry
+        ids = decode_postings(self._data[offset : offset + length])
+        self._postings[tri] = ids
+        return ids
+
+    def _block(self, block_id: int) -> List[Tuple[int, str]]:
+        docs = self._decoded.get(block_id)
+        if docs is None:
+            offset, length = self._blocks[block_id]
+            docs = json.loads(zlib.decompress(self._data[offset : offset + length]))
+            self._decoded[block_id] = docs
+        return docs
+
+    def _document(self, doc_id: int) -> Tuple[int, str]:
+        if doc_id < len(self._docs):
+            return self._docs[doc_id]
+        block_id, i = divmod(doc_id, DOC_BLOCK)
+        return tuple(self._block(block_id)[i])
+
+    # ---------------------------------------------------------------- queries
+
+    def _posting_size(self, tri: str) -> int:
+        entry = self._encoded.get(tri)
+        if entry is not None:
+            return entry[1]
+        return len(self._postings.get(tri, ()))
+
+    def candidates(self, literal: Optional[str]) -> Optional[List[int]]:
+        """
+        Ids of documents that may contain literal; None = all. Shortest
+        posting lists are intersected first, and the long lists of common
+        trigrams are skipped once checking the candidates is cheaper.
+        """
+        if not literal or len(literal) < 3:
+            return None
+        result = None
+        for tri in sorted(trigrams(literal), key=self._posting_size):
+            if result is not None and (
+                not result or self._posting_size(tri) > CHECK_COST * len(result)
+            ):
+                break
+            ids = self._posting(tri)
+            result = set(ids) if result is None else result.intersection(ids)
+        return sorted(result)
+
+    def _verify(self, ids: Optional[List[int]], match) -> List[Hit]:
+        if ids is None:
+            ids = range(self.doc_count)
+        elif not ids:
+            return []
+        hits = []
+        for doc_id in ids:
+            ns_id, text = self._document(doc_id)
+            if match(text):
+                hits.append(Hit(self.namespaces[ns_id], text))
+        return hits
+
+    def search(self, substring: str, ignore_case: bool = False) -> List[Hit]:
+        """Every document containing substring"""
+        if ignore_case:
+            needle = substring.lower()
+            match = lambda text: needle in text.lower()  # noqa: E731
+        else:
+            match = lambda text: substring in text  # noqa: E731
+        return self._verify(self.candidates(substring), match)
+
+    def search_regex(self, pattern: str, flags: int = 0) -> List[Hit]:
+        """Every document the regex matches; its longest literal prunes first"""
+        regex = re.compile(pattern, flags)
+        return self._verify(self.candidates(guess_literal(pattern)), regex.search)
+
+
+def search_indexes(
+    index_files: Sequence[str], query: str, regex: bool = False
+) -> Iterable[Tuple[str, Hit]]:
+    """Run one query over many saved indexes (e.g. a month of days)"""
+    for index_file in index_files:
+        index = ErrorIndex.load(index_file)
+        hits = index.search_regex(query) if regex else index.search(query)
+        for hit in hits:
+            yield index_file, hit
+
+
+if __name__ == "__main__":
+    import glob
+    import sys
+
+    # Usage: python -m log_parser.error_index "<fragment>" [index files...]
+    query = sys.argv[1] if len(sys.argv) > 1 else "DO channel"
+    files = sys.argv[2:] or glob.glob(f"error_logs/{INDEX_NAME}")
+    count = 0
+    for index_file, hit in search_indexes(files, query):
+        count += 1
+        print(f"{index_file}  {hit.namespace}: {hit.text.splitlines()[0]}")
+    print(f"{count} match(es)")
@@ -0,0 +1,169 @@
+import codecs
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Bytes read per chunk; lines are never split across chunks
+CHUNK_SIZE = 1 << 20
+
+RECORD_RE = re.compile(
+    r"^(?P<date>\d{4}-\d{2}-\d{2})\s+"
+    r"(?P<time>\d{2}:\d{2}:\d{2},\d{3})"
+)
+
+LEVEL_RE = re.compile(r"\[\d+\]\s+(ERROR|INFO|WARN|DEBUG|TRACE)\s+([\w\.]+)\s+-")
+
+
+@dataclass
+class LogRecord:
+    line: str  # first line, without the trailing newline
+    date: Optional[str] = None
+    time: Optional[str] = None
+    level: Optional[str] = None
+    namespace: Optional[str] = None
+    continuation: List[str] = field(default_factory=list)  # e.g. stack trace lines
+    source: Optional[str] = None  # station/service tag in a merged timeline
+
+    @property
+    def text(self) -> str:
+        """The full record, continuation lines included"""
+        if not self.continuation:
+            return self.line
+        return "\n".join([self.line, *self.continuation])
+
+
+def _decode(chunk: bytes, encoding: str) -> str:
+    try:
+        text = chunk.decode(encoding)
+    except UnicodeDecodeError:
+        # Lenient only for the chunk that has bad bytes
+        text = chunk.decode(encoding, errors="replace")
+    if "\r" in text:
+        # Universal newlines, as text-mode open() did: \r\n and bare \r
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _iter_chunked(f, chunk_size: int, limit: Optional[int] = None) -> Iterator[str]:
+    """Decode lines from a binary file positioned at a line start"""
+    leftover = b""
+    while True:
+        size = chunk_size if limit is None else min(chunk_size, limit)
+        chunk = f.read(size) if size > 0 else b""
+        if not chunk:
+            break
+        if limit is not None:
+            limit -= len(chunk)
+        chunk = leftover + chunk
+        # A trailing \r may be the first half of a \r\n split across chunks
+        end = len(chunk) - 1 if chunk.endswith(b"\r") else len(chunk)
+        cut = max(chunk.rfind(b"\n", 0, end), chunk.rfind(b"\r", 0, end)) + 1
+        if cut == 0:
+            leftover = chunk
+            continue
+        leftover = chunk[cut:]
+        lines = _decode(chunk[:cut], "utf-8").split("\n")
+        lines.pop()  # empty tail after the final newline
+        for line in lines:
+            yield line + "\n"
+
+    if leftover:
+        # Final line(s), the last possibly without a newline
+        lines = _decode(leftover, "utf-8").split("\n")
+        for line in lines[:-1]:
+            yield line + "\n"
+        if lines[-1]:
+            yield lines[-1]
+
+
+def iter_lines(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield lines (with "\\n") from a log file.
+
+    Reads in large binary chunks and decodes each as UTF-8 (ASCII is the
+    common, fastest case). A chunk with invalid bytes is decoded with
+    replacement characters instead of aborting the whole read. Line endings
+    are universal, as with text-mode open(): "\\r\\n" and a bare "\\r" both
+    come out as "\\n". UTF-8 and UTF-16 byte order marks are honoured.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(4)
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            # Rare .NET configuration; let the text layer handle UTF-16
+            with open(file_path, "r", encoding="utf-16", errors="replace") as tf:
+                yield from tf
+            return
+        f.seek(len(codecs.BOM_UTF8) if head.startswith(codecs.BOM_UTF8) else 0)
+        yield from _iter_chunked(f, chunk_size)
+
+
+def split_ranges(file_path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into about `parts` byte ranges that start on line starts"""
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+    bounds = [0]
+    with open(file_path, "rb") as f:
+        for k in range(1, parts):
+            target = size * k // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target)
+            f.readline()  # move to the start of the next line
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def iter_line_range(
+    file_path: str, start: int, end: int, chunk_size: int = CHUNK_SIZE
+) -> Iterator[str]:
+    """Lines in the byte range [start, end) as produced by split_ranges"""
+    with open(file_path, "rb") as f:
+        if start == 0 and f.read(3) == codecs.BOM_UTF8:
+            start = len(codecs.BOM_UTF8)
+        f.seek(start)
+        yield from _iter_chunked(f, chunk_size, end - start)
+
+
+def iter_records(lines: Iterable[str]) -> Iterator[LogRecord]:
+    """
+    Group lines into records. A line starting with a timestamp opens a new
+    record; any other line (stack trace, wrapped message) is attached to the
+    record before it. Lines before the first timestamp form their own
+    record with no timestamp.
+    """
+    record: Optional[LogRecord] = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        ts = RECORD_RE.match(line) if line[:1].isdigit() else None
+        if ts is None:
+            if record is None:
+                record = LogRecord(line=line)
+            elif line.strip():
+                record.continuation.append(line)
+            continue
+
+        if record is not None:
+            yield record
+        level = LEVEL_RE.search(line, ts.end())
+        record = LogRecord(
+            line=line,
+            date=ts["date"],
+            time=ts["time"],
+            level=level.group(1) if level else None,
+            namespace=level.group(2) if level else None,
+        )
+
+    if record is not None:
+        yield record
+
+
+def read_records(file_path: str) -> Iterator[LogRecord]:
+    """Records from a log file, decoded leniently"""
+    return iter_records(iter_lines(file_path))
@@ -1,5 +1,5 @@
-from log_parser.line_parser import read_log, write_sessions_to_file
-import re
+from log_parser.session_cache import cached_read_log
+from log_parser.uph_parser import write_sessions_to_file
 
 
 def main():
@@ -12,8 +12,8 @@ def main():
     log_file_24 = folder_24 + "App.log"
     log_file_23 = folder_23 + "App.log"
 
-    session_23 = read_log(log_file_23)
-    session_24 = read_log(log_file_24)
+    session_23 = cached_read_log(log_file_23)
+    session_24 = cached_read_log(log_file_24)
     write_sessions_to_file(session_23, output_file_23)
     write_sessions_to_file(session_24, output_file_24)
 
@@ -0,0 +1,414 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from log_parser.codec import decode_blocks, encode_block
+from log_parser.correlate import MetricSample, iter_metric_samples
+from log_parser.log_reader import iter_line_range
+
+# Days each resolution is kept; None keeps it forever
+DEFAULT_RETENTION = {"raw": 14, "1m": 180, "1h": None}
+
+RESOLUTIONS = {"1m": 60_000, "1h": 3_600_000}  # bucket width in ms
+
+RAW_FIELDS = 4  # ts_ms (local), total_units, rolling_uph, total_time_ms
+ROLLUP_FIELDS = 6  # bucket_ms, samples, units, rolling_sum, rolling_min, rolling_max
+
+
+@dataclass
+class Rollup:
+    timestamp: datetime  # bucket start
+    samples: int
+    units: int  # units produced in the bucket (counter resets handled)
+    rolling_uph_mean: float
+    rolling_uph_min: int
+    rolling_uph_max: int
+    width_ms: int = 60_000
+
+    @property
+    def uph(self) -> float:
+        """Production rate over the bucket, scaled to units per hour"""
+        return self.units * 3_600_000 / self.width_ms
+
+
+def _last_line_end(file_path: str, offset: int, size: int) -> int:
+    """End of the last complete line in [offset, size); partial lines wait"""
+    step = 1 << 16
+    with open(file_path, "rb") as f:
+        pos = size
+        while pos > offset:
+            start = max(offset, pos - step)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline != -1:
+                return start + newline + 1
+            pos = start
+    return offset
+
+
+# Timestamps are stored as milliseconds of local wall-clock time since
+# 1970-01-01, not UTC epoch ms: log times are naive local times, and bucket
+# starts must land on local minute/hour/day boundaries in any timezone.
+_EPOCH = datetime(1970, 1, 1)
+_MS = timedelta(milliseconds=1)
+
+
+def _to_ms(ts: datetime) -> int:
+    return (ts - _EPOCH) // _MS
+
+
+def _from_ms(ms: int) -> datetime:
+    return _EPOCH + ms * _MS
+
+
+class MetricStore:
+    """
+    Append-only local store for TotalUnits / Rolling UPH samples.
+
+    Layout under root:
+        raw/YYYY-MM-DD.seg   delta-encoded samples, one block per append
+        1m/YYYY-MM-DD.seg    per-minute rollups (rewritten on compaction)
+        1h/YYYY-MM.seg       per-hour rollups
+        state.json           ingest offsets, compaction and expiry marks
+    """
+
+    def __init__(self, root: str, retention: Optional[Dict[str, int]] = None):
+        self.root = root
+        self.retention = dict(retention or DEFAULT_RETENTION)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for name in ("raw", *RESOLUTIONS):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+        self._state = self._load_state()
+
+    # -- state ---------------------------------------------------------------
+
+    def _state_path(self) -> str:
+        return os.path.join(self.root, "state.json")
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"offsets": {}, "compacted": {}}
+
+    def _save_state(self):
+        tmp = self._state_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp, self._state_path())
+
+    def _path(self, resolution: str, partition: str) -> str:
+        return os.path.join(self.root, resolution, f"{partition}.seg")
+
+    # -- writes --------------------------------------------------------------
+
+    def append(self, samples: Iterable[MetricSample]) -> int:
+        """Append samples (in time order) to their day partitions"""
+        by_day: Dict[str, List[Tuple[int, ...]]] = {}
+        for s in samples:
+            by_day.setdefault(s.timestamp.strftime("%Y-%m-%d"), []).append(
+                (
+                    _to_ms(s.timestamp),
+                    s.total_units,
+                    s.rolling_uph,
+                    round(s.total_time * 1000),
+                )
+            )
+        with self._lock:
+            for day, rows in by_day.items():
+                with open(self._path("raw", day), "ab") as f:
+                    f.write(encode_block(rows, RAW_FIELDS))
+        return sum(len(rows) for rows in by_day.values())
+
+    def ingest_log(self, log_path: str) -> int:
+        """Append only the part of a log not ingested yet"""
+        key = os.path.abspath(log_path)
+        size = os.path.getsize(log_path)
+        offset = self._state["offsets"].get(key, 0)
+        if size < offset:
+            # Truncated or rotated: start over
+            offset = 0
+        if size == offset:
+            return 0
+
+        end = _last_line_end(log_path, offset, size)
+        if end <= offset:
+            return 0
+
+        lines = iter_line_range(log_path, offset, end)
+        count = self.append(iter_metric_samples(lines))
+        with self._lock:
+            self._state["offsets"][key] = end
+            self._save_state()
+        return count
+
+    # -- reads ---------------------------------------------------------------
+
+    def _partitions(self, resolution: str) -> List[str]:
+        folder = os.path.join(self.root, resolution)
+        names = os.listdir(folder)
+        return sorted(name[:-4] for name in names if name.endswith(".seg"))
+
+    def _read_rows(self, resolution: str, partition: str, width: int):
+        try:
+            with open(self._path(resolution, partition), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return iter(())
+        return decode_blocks(data, width)
+
+    def read_raw(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Iterator[MetricSample]:
+        lo = _to_ms(start) if start else None
+        hi = _to_ms(end) if end else None
+        for day in self._partitions("raw"):
+            if start and day < start.strftime("%Y-%m-%d"):
+                continue
+            if end and day > end.strftime("%Y-%m-%d"):
+                break
+            for row in self._read_rows("raw", day, RAW_FIELDS):
+                ts, units, rolling, time_ms = row
+                if (lo is None or ts >= lo) and (hi is None or ts < hi):
+                    yield MetricSample(_from_ms(ts), units, rolling, time_ms / 1000)
+
+    def read_rollups(
+        self,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[Rollup]:
+        width_ms = RESOLUTIONS[resolution]
+        lo = _to_ms(start) if start else None
+        hi = _to_ms(end) if end else None
+        # Day partitions for 1m, month partitions for 1h
+        start_key = start.strftime("%Y-%m-%d") if start else None
+        end_key = end.strftime("%Y-%m-%d") if end else None
+        for partition in self._partitions(resolution):
+            if start_key and partition < start_key[: len(partition)]:
+                continue
+            if end_key and partition > end_key[: len(partition)]:
+                break
+            for row in self._read_rows(resolution, partition, ROLLUP_FIELDS):
+                bucket, samples, units, rolling_sum, rolling_min, rolling_max = row
+                if lo is not None and bucket + width_ms <= lo:
+                    continue
+                if hi is not None and bucket >= hi:
+                    continue
+                yield Rollup(
+                    _from_ms(bucket),
+                    samples,
+                    units,
+                    rolling_sum / samples,
+                    rolling_min,
+                    rolling_max,
+                    width_ms,
+                )
+
+    def query(
+        self,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+    ):
+        """
+        Samples or rollups for [start, end). Without a resolution, the span
+        picks one, falling back to coarser ones whose retention still
+        covers start.
+        """
+        if resolution is None:
+            picked = pick_resolution(end - start)
+            order = ["raw", *RESOLUTIONS]
+            resolution = next(
+                (r for r in order[order.index(picked) :] if self._covers(r, start)),
+                picked,
+            )
+        if resolution == "raw":
+            return list(self.read_raw(start, end))
+        return list(self.read_rollups(resolution, start, end))
+
+    def _covers(self, resolution: str, start: datetime) -> bool:
+        """Whether retention has kept this resolution's data back to start"""
+        expired = self._state.get("expired", {}).get(resolution)
+        return expired is None or start.strftime("%Y-%m-%d") > expired
+
+    # -- compaction and retention --------------------------------------------
+
+    def compact(self) -> int:
+        """
+        Roll raw partitions that changed since the last run into 1m/1h
+        rollups, merge their append blocks into one, and apply retention.
+        Returns the number of raw partitions compacted.
+        """
+        compacted = 0
+        prev_units = None
+        for day in self._partitions("raw"):
+            path = self._path("raw", day)
+            size = os.path.getsize(path)
+            if self._state["compacted"].get(day) == size:
+                prev_units = None
+                continue
+            if prev_units is None:
+                prev_units = self._last_units_before(day)
+            with self._lock:
+                rows = sorted(self._read_rows("raw", day, RAW_FIELDS))
+                data = encode_block(rows, RAW_FIELDS)
+                self._replace(path, data)
+                self._state["compacted"][day] = len(data)
+                self._save_state()
+            self._write_rollups(day, rows, prev_units)
+            prev_units = rows[-1][1] if rows else prev_units
+            compacted += 1
+        self.apply_retention()
+        return compacted
+
+    def _last_units_before(self, day: str) -> Optional[int]:
+        """TotalUnits at the end of the previous day, so midnight is not a gap"""
+        earlier = [p for p in self._partitions("raw") if p < day]
+        if not earlier:
+            return None
+        last = None
+        for row in self._read_rows("raw", earlier[-1], RAW_FIELDS):
+            last = row
+        return last[1] if last else None
+
+    def _replace(self, path: str, data: bytes):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_rollups(
+        self, day: str, rows: List[Tuple[int, ...]], prev_units: Optional[int]
+    ):
+        minute = _rollup(rows, RESOLUTIONS["1m"], prev_units)
+        with self._lock:
+            minute_path = self._path("1m", day)
+            self._replace(minute_path, encode_block(minute, ROLLUP_FIELDS))
+
+            # Hour partitions are monthly: rebuild the month from its minute files
+            month = day[:7]
+            minutes = []
+            for part in self._partitions("1m"):
+                if part.startswith(month):
+                    minutes.extend(self._read_rows("1m", part, ROLLUP_FIELDS))
+            hours = _merge_rollups(minutes, RESOLUTIONS["1h"])
+            hour_path = self._path("1h", month)
+            self._replace(hour_path, encode_block(hours, ROLLUP_FIELDS))
+
+    def apply_retention(self, now: Optional[datetime] = None):
+        """
+        Drop partitions older than each resolution's retention, counted back
+        from now (default: the newest ingested day, so compacting a backfill
+        of old logs does not delete what it just ingested).
+        """
+        if now is None:
+            days = self._partitions("raw")
+            if not days:
+                return
+            now = datetime.strptime(days[-1], "%Y-%m-%d")
+        for resolution, days in self.retention.items():
+            if days is None:
+                continue
+            cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+            for partition in self._partitions(resolution):
+                # Monthly partitions expire once their last day is past the cutoff
+                last_day = partition if len(partition) == 10 else partition + "-31"
+                if last_day < cutoff:
+                    os.remove(self._path(resolution, partition))
+                    if resolution == "raw":
+                        self._state["compacted"].pop(partition, None)
+                    expired = self._state.setdefault("expired", {})
+                    expired[resolution] = max(expired.get(resolution, ""), last_day)
+        with self._lock:
+            self._save_state()
+
+    def start_background_compaction(self, interval: float = 300.0):
+        """Compact every `interval` seconds on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"Compaction failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop_background_compaction(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def _rollup(
+    rows: List[Tuple[int, ...]], width_ms: int, prev_units: Optional[int] = None
+) -> List[Tuple[int, ...]]:
+    """Raw (ts, units, rolling, time) rows -> rollup rows"""
+    buckets: Dict[int, list] = {}
+    for ts, units, rolling, _ in rows:
+        produced = 0
+        if prev_units is not None:
+            produced = units - prev_units if units >= prev_units else units
+        prev_units = units
+        b = ts - ts % width_ms
+        acc = buckets.get(b)
+        if acc is None:
+            buckets[b] = [b, 1, produced, rolling, rolling, rolling]
+        else:
+            acc[1] += 1
+            acc[2] += produced
+            acc[3] += rolling
+            acc[4] = min(acc[4], rolling)
+            acc[5] = max(acc[5], rolling)
+    return [tuple(buckets[b]) for b in sorted(buckets)]
+
+
+def _merge_rollups(rows: Iterable[Tuple[int, ...]], width_ms: int):
+    """Coarsen rollup rows into wider buckets"""
+    buckets: Dict[int, list] = {}
+    for bucket, samples, units, rolling_sum, rolling_min, rolling_max in rows:
+        b = bucket - bucket % width_ms
+        acc = buckets.get(b)
+        if acc is None:
+            buckets[b] = [b, samples, units, rolling_sum, rolling_min, rolling_max]
+        else:
+            acc[1] += samples
+            acc[2] += units
+            acc[3] += rolling_sum
+            acc[4] = min(acc[4], rolling_min)
+            acc[5] = max(acc[5], rolling_max)
+    return [tuple(buckets[b]) for b in sorted(buckets)]
+
+
+def pick_resolution(span: timedelta) -> str:
+    if span <= timedelta(days=2):
+        return "raw"
+    if span <= timedelta(days=60):
+        return "1m"
+    return "1h"
+
+
+if __name__ == "__main__":
+    # Configuration - Change these to your paths
+    store_root = "/home/dhruvkumarjiguda/code/log_parser/metric_store"
+    logs = [
+        "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-23/App.log",
+        "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log",
+    ]
+
+    store = MetricStore(store_root)
+    for log in logs:
+        if os.path.exists(log):
+            print(f"Ingested {store.ingest_log(log)} samples from {log}")
+    print(f"Compacted {store.compact()} partition(s)")
@@ -0,0 +1,380 @@
+"""
+Equivalence harness for session parser backends.
+
+error_parser.read_log is the untouched original parser and serves as the
+reference. Every backend is run over generated logs (random layouts,
+plus well-formed logs whose expected sessions are known up front) and over
+real logs, and must return exactly the same sessions. Golden files pin the
+reference output of real logs so later changes to any backend, the
+reference included, show up as a diff. Throughput is recorded per backend.
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from log_parser import error_parser
+from log_parser.session_cache import cached_read_log, clear_memory_cache
+from log_parser.session_state import parse_sessions, parse_sessions_parallel
+from log_parser.uph_parser import read_log
+
+# Fields of the original session; newer backends may add more (end_date)
+SESSION_FIELDS = [f.name for f in fields(error_parser.session)]
+
+
+def _cached_no_disk(file_path: str):
+    clear_memory_cache()
+    return cached_read_log(file_path, use_disk=False)
+
+
+def _reference(file_path: str):
+    """
+    The original parser. It only reads valid UTF-8, so a log with invalid
+    bytes is handed to it decoded the way the lenient readers decode it.
+    """
+    try:
+        return error_parser.read_log(file_path)
+    except UnicodeDecodeError:
+        pass
+    with open(file_path, "rb") as f:
+        text = f.read().decode("utf-8", errors="replace")
+    fd, clean = tempfile.mkstemp(suffix=".log")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return error_parser.read_log(clean)
+    finally:
+        os.remove(clean)
+
+
+BACKENDS: Dict[str, Callable[[str], list]] = {
+    "reference": _reference,
+    "uph_parser": read_log,
+    "session_cache": _cached_no_disk,
+    "state_machine": lambda path: parse_sessions(path, legacy=True),
+    "state_machine_parallel": lambda path: parse_sessions_parallel(
+        path, workers=4, legacy=True
+    ),
+}
+
+
+def session_key(s) -> Tuple:
+    return tuple(getattr(s, name) for name in SESSION_FIELDS)
+
+
+def session_dict(s) -> dict:
+    return dict(zip(SESSION_FIELDS, session_key(s)))
+
+
+# ============================================================================
+# Log generators
+# ============================================================================
+
+
+def _stamp(t: datetime) -> str:
+    return t.strftime("%Y-%m-%d %H:%M:%S,") + f"{t.microsecond // 1000:03d}"
+
+
+# A stray byte, a truncated sequence and an overlong encoding
+INVALID_UTF8 = (b"\xff", b"\xc3", b"\xe2\x82", b"\xc0\xaf")
+
+
+def _metrics_line(t: datetime, units: int, rolling: int, total_time: float) -> str:
+    return (
+        f"{_stamp(t)} [5] INFO Services.Metrics - TotalUnits: {units}, "
+        f"Rolling UPH: {rolling}, TotalTime: {total_time:.2f}\n"
+    )
+
+
+def generate_noisy_log(rng: random.Random, n_lines: int) -> List[bytes]:
+    """
+    Arbitrary mix of inits, metrics, errors, stack traces, undated lines and
+    counter resets - no expected output, only cross-backend agreement.
+    Lines end in \\n, \\r\\n, a bare \\r or a mix of them, and a few carry
+    bytes that are not valid UTF-8.
+    """
+    t = datetime(2026, 1, 24, rng.randint(0, 23), rng.randint(0, 59))
+    units, total_time = rng.randint(0, 5), 0.0
+    lines = []
+    for _ in range(n_lines):
+        t += timedelta(seconds=rng.randint(1, 400), milliseconds=rng.randint(0, 999))
+        k = rng.random()
+        if k < 0.12:
+            lines.append(f"{_stamp(t)} [1] INFO UI.App - Application initialized\n")
+        elif k < 0.15:
+            lines.append("Application initialized (undated)\n")
+        elif k < 0.6:
+            if rng.random() < 0.03:
+                units, total_time = 0, 0.0
+            units += rng.randint(0, 3)
+            total_time += rng.uniform(0, 100)
+            line = _metrics_line(t, units, rng.randint(0, 120), total_time)
+            if rng.random() < 0.1:
+                line = line[len(_stamp(t)) + 1 :]
+            lines.append(line)
+        elif k < 0.7:
+            lines.append("   at Services.IOController.Write()\n")
+        else:
+            lines.append(
+                f"{_stamp(t)} [2] ERROR Services.IOController - "
+                f"Failed to write DO channel {rng.randint(0, 9)}\n"
+            )
+    return _raw_lines(rng, lines)
+
+
+def _raw_lines(rng: random.Random, lines: List[str]) -> List[bytes]:
+    """Encode lines with a random line-ending style and some invalid bytes"""
+    style = rng.choice(("\n", "\n", "\r\n", "\r", None))  # None: mixed
+    raw = []
+    for line in lines:
+        data = line.rstrip("\n").encode("utf-8")
+        if rng.random() < 0.02:
+            cut = rng.randint(0, len(data))
+            data = data[:cut] + rng.choice(INVALID_UTF8) + data[cut:]
+        eol = style or rng.choice(("\n", "\r\n", "\r"))
+        raw.append(data + eol.encode("ascii"))
+    return raw
+
+
+@dataclass
+class ExpectedSession:
+    date: str
+    start_time: str
+    end_time: Optional[str]
+    metrics: List[Tuple[int, float, int]]  # (units, total_time, rolling)
+
+    @property
+    def pallets(self) -> int:
+        if not self.metrics:
+            return 0
+        if len(self.metrics) == 1:
+            return 1  # Only one metrics line - pallets = 1
+        return self.metrics[-1][0] - self.metrics[0][0]
+
+
+def generate_known_log(
+    rng: random.Random, n_sessions: int
+) -> Tuple[List[str], List[ExpectedSession]]:
+    """Well-formed log whose sessions are known without parsing it"""
+    t = datetime(2026, 1, 24, 6, 0)
+    lines: List[str] = []
+    expected: List[ExpectedSession] = []
+    for _ in range(n_sessions):
+        t += timedelta(seconds=rng.randint(1, 600))
+        lines.append(f"{_stamp(t)} [1] INFO UI.App - Application initialized\n")
+        current = ExpectedSession(t.strftime("%Y-%m-%d"), _stamp(t)[11:], None, [])
+        if expected:
+            expected[-1].end_time = current.start_time
+        expected.append(current)
+
+        units, total_time = rng.randint(0, 1000), rng.uniform(0, 5000)
+        # 0 and 1 metrics lines are the special cases worth hitting often
+        for _ in range(rng.choice((0, 1, 1, 2, rng.randint(3, 40)))):
+            t += timedelta(seconds=rng.randint(1, 120))
+            units += rng.randint(0, 2)
+            total_time = round(total_time + rng.uniform(0, 120), 2)
+            rolling = rng.randint(0, 120)
+            lines.append(_metrics_line(t, units, rolling, total_time))
+            current.metrics.append((units, total_time, rolling))
+            if rng.random() < 0.2:
+                lines.append(
+                    f"{_stamp(t)} [2] ERROR Services.IOController - "
+                    f"Failed to write DO channel 8\n"
+                )
+    if expected:
+        expected[-1].end_time = _stamp(t)[11:]
+    return lines, expected
+
+
+def check_expected(sessions, expected: List[ExpectedSession]) -> List[str]:
+    """Differences between parsed sessions and the generator's ground truth"""
+    problems = []
+    if len(sessions) != len(expected):
+        return [f"expected {len(expected)} sessions, got {len(sessions)}"]
+    for i, (s, e) in enumerate(zip(sessions, expected), start=1):
+        uph = None
+        if len(e.metrics) > 1:
+            elapsed = e.metrics[-1][1] - e.metrics[0][1]
+            if elapsed > 0 and e.pallets > 0:
+                uph = e.pallets / elapsed * 3600
+        checks = [
+            ("session_id", s.session_id, i),
+            ("date", s.date, e.date),
+            ("start_time", s.start_time, e.start_time),
+            ("end_time", s.end_time, e.end_time),
+            ("pallets_produced", s.pallets_produced, e.pallets),
+            ("uph", s.uph, uph),
+        ]
+        if e.metrics:
+            checks += [
+                ("init_total_time", s.init_total_time, e.metrics[0][1]),
+                ("final_total_time", s.final_total_time, e.metrics[-1][1]),
+                ("init_rolling_uph", s.init_rolling_uph, e.metrics[0][2]),
+                ("final_rolling_uph", s.final_rolling_uph, e.metrics[-1][2]),
+            ]
+        for name, got, want in checks:
+            if got != want:
+                problems.append(f"session {i} {name}: got {got!r}, want {want!r}")
+    return problems
+
+
+# ============================================================================
+# Comparison
+# ============================================================================
+
+
+@dataclass
+class BackendResult:
+    name: str
+    seconds: float
+    sessions: int
+    lines_per_second: float
+    matches: bool
+
+
+def compare_backends(
+    file_path: str, backends: Optional[Dict[str, Callable]] = None
+) -> Tuple[List[BackendResult], List[str]]:
+    """Run every backend on one log; returns timings and mismatch messages"""
+    backends = backends or BACKENDS
+    with open(file_path, "rb") as f:
+        n_lines = sum(1 for _ in f)
+
+    reference = None
+    results, problems = [], []
+    for name, parse in backends.items():
+        start = time.perf_counter()
+        sessions = parse(file_path)
+        seconds = time.perf_counter() - start
+        keys = [session_key(s) for s in sessions]
+        if reference is None:
+            reference = keys
+        matches = keys == reference
+        if not matches:
+            problems.append(f"{file_path}: {name} differs from the reference")
+        results.append(
+            BackendResult(
+                name,
+                seconds,
+                len(sessions),
+                n_lines / seconds if seconds > 0 else float("inf"),
+                matches,
+            )
+        )
+    return results, problems
+
+
+def _write_lines(
+    directory: str, name: str, lines: Sequence[Union[str, bytes]]
+) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.writelines(
+            line.encode("utf-8") if isinstance(line, str) else line for line in lines
+        )
+    return path
+
+
+def run_generated(n_logs: int = 200, seed: int = 0, parallel_every: int = 20):
+    """
+    Random logs through every backend, plus known-answer logs checked
+    against the generator. The process-pool backend is only run on every
+    parallel_every-th log to keep the run short.
+    """
+    rng = random.Random(seed)
+    cheap = {k: v for k, v in BACKENDS.items() if k != "state_machine_parallel"}
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(n_logs):
+            backends = BACKENDS if i % parallel_every == 0 else cheap
+            path = _write_lines(
+                tmp, f"noisy_{i}.log", generate_noisy_log(rng, rng.randint(0, 300))
+            )
+            problems.extend(compare_backends(path, backends)[1])
+
+            lines, expected = generate_known_log(rng, rng.randint(0, 30))
+            path = _write_lines(tmp, f"known_{i}.log", lines)
+            for name, parse in backends.items():
+                for problem in check_expected(parse(path), expected):
+                    problems.append(f"known_{i}.log {name}: {problem}")
+    return problems
+
+
+# ============================================================================
+# Golden files
+# ============================================================================
+
+
+def save_golden(log_paths: Sequence[str], golden_file: str):
+    """Pin the reference parser's output for real logs"""
+    golden = {
+        path: [session_dict(s) for s in error_parser.read_log(path)]
+        for path in log_paths
+    }
+    with open(golden_file, "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=1)
+
+
+def check_golden(golden_file: str) -> List[str]:
+    """Compare every backend against the pinned output"""
+    with open(golden_file, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    problems = []
+    for path, want in golden.items():
+        if not os.path.exists(path):
+            problems.append(f"{path}: missing")
+            continue
+        for name, parse in BACKENDS.items():
+            got = [session_dict(s) for s in parse(path)]
+            if got != want:
+                problems.append(f"{path}: {name} differs from {golden_file}")
+    return problems
+
+
+def run_harness(
+    log_paths: Sequence[str], golden_file: Optional[str] = None, n_logs: int = 200
+) -> bool:
+    """Generated logs, golden files and per-backend throughput in one report"""
+    problems = run_generated(n_logs)
+    if golden_file and os.path.exists(golden_file):
+        problems.extend(check_golden(golden_file))
+
+    print("=" * 78)
+    print("PARSER BACKEND CHECK")
+    print("=" * 78)
+    for path in log_paths:
+        if not os.path.exists(path):
+            continue
+        results, mismatches = compare_backends(path)
+        problems.extend(mismatches)
+        print(path)
+        for r in results:
+            status = "ok" if r.matches else "MISMATCH"
+            print(
+                f"  {r.name:<24} {r.seconds:8.3f}s {r.lines_per_second:12,.0f} lines/s"
+                f" {r.sessions:6d} sessions  {status}"
+            )
+    print("-" * 78)
+    for problem in problems[:50]:
+        print(f"  {problem}")
+    print(f"{len(problems)} problem(s) over {n_logs * 2} generated log(s)")
+    print("=" * 78)
+    return not problems
+
+
+if __name__ == "__main__":
+    # Configuration - Change these to your file names
+    real_logs = [
+        "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-23/App.log",
+        "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log",
+    ]
+    golden = "golden_sessions.json"
+
+    if not os.path.exists(golden):
+        save_golden([p for p in real_logs if os.path.exists(p)], golden)
+    raise SystemExit(0 if run_harness(real_logs, golden) else 1)
@@ -1,14 +1,28 @@
 import matplotlib.pyplot as plt
 import os
 
+from log_parser.session_cache import cached_read_log, to_plot_sessions
+
+from log_parser.anomaly import detect_anomalies
+
 # ============================================================================
 # EDIT THESE FILE PATHS - Just change these two lines
 # ============================================================================
 SESSION_23_PATH = "/home/dhruvkumarjiguda/code/log_parser/sessions_23.txt"
 SESSION_24_PATH = "/home/dhruvkumarjiguda/code/log_parser/sessions_24.txt"
+# Raw logs are preferred when present (parsed once, shared via the session cache)
+LOG_23_PATH = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-23/App.log"
+LOG_24_PATH = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log"
 # ============================================================================
 
 
+def load_sessions(log_path, session_path):
+    """Sessions from the raw log if available, else from the text export"""
+    if os.path.exists(log_path):
+        return to_plot_sessions(cached_read_log(log_path))
+    return parse_session_file(session_path)
+
+
 def parse_session_file(filepath):
     """Parse session data from txt file"""
     sessions = []
@@ -53,6 +67,15 @@ def parse_session_file(filepath):
     return sessions
 
 
+def create_placeholder_plot(output_filename, message):
+    """Image with just a message, for days that have nothing to plot"""
+    fig, ax = plt.subplots(figsize=(8, 3))
+    ax.axis("off")
+    ax.text(0.5, 0.5, message, ha="center", va="center", fontsize=14)
+    plt.savefig(output_filename, dpi=100, bbox_inches="tight")
+    plt.close(fig)
+
+
 def create_analysis_plots(sessions, output_filename, title_prefix):
     """Create comprehensive analysis plots"""
 
@@ -67,6 +90,21 @@ def create_analysis_plots(sessions, output_filename, title_prefix):
     pallets = [s["pallets"] for s in sessions]
     sec_per_pallet = [s["sec_per_pallet"] for s in sessions]
 
+    # Online anomaly detection, replayed in session order
+    anomalies = detect_anomalies(sessions)
+    flagged_spp = [
+        (s["session_id"], s["sec_per_pallet"])
+        for s in sessions
+        if any(
+            a.metric == "seconds_per_pallet" for a in anomalies.get(s["session_id"], [])
+        )
+    ]
+    flagged_uph = [
+        s["session_id"]
+        for s in sessions
+        if any(a.metric == "uph" for a in anomalies.get(s["session_id"], []))
+    ]
+
     # Create figure with multiple subplots
     fig = plt.figure(figsize=(16, 10))
 
@@ -115,6 +153,17 @@ def create_analysis_plots(sessions, output_filename, title_prefix):
         label=f"Average: {avg_spp:.2f}s",
         linewidth=2,
     )
+    if flagged_spp:
+        ax3.scatter(
+            [sid for sid, _ in flagged_spp],
+            [spp for _, spp in flagged_spp],
+            marker="x",
+            color="red",
+            s=150,
+            linewidths=3,
+            zorder=5,
+            label="Anomaly",
+        )
     ax3.legend(fontsize=10)
 
     # 4. UPH vs Pallets Produced (Scatter)
@@ -132,7 +181,20 @@ def create_analysis_plots(sessions, output_filename, title_prefix):
     ax5 = plt.subplot(2, 3, 5)
     uph_diff = [calc - roll for calc, roll in zip(calc_uph, rolling_uph)]
     colors = ["green" if d >= 0 else "red" for d in uph_diff]
-    ax5.bar(session_ids, uph_diff, color=colors, alpha=0.6)
+    bars5 = ax5.bar(session_ids, uph_diff, color=colors, alpha=0.6)
+    for bar, sid in zip(bars5, session_ids):
+        if sid in flagged_uph:
+            bar.set_edgecolor("black")
+            bar.set_hatch("//")
+            ax5.annotate(
+                "!",
+                (bar.get_x() + bar.get_width() / 2, bar.get_height()),
+                ha="center",
+                va="bottom" if bar.get_height() >= 0 else "top",
+                fontsize=12,
+                fontweight="bold",
+                color="darkred",
+            )
     ax5.axhline(y=0, color="black", linestyle="-", linewidth=1)
     ax5.set_xlabel("Session ID", fontsize=12)
     ax5.set_ylabel("UPH Difference (Calc - Rolling)", fontsize=12)
@@ -161,6 +223,7 @@ def create_analysis_plots(sessions, output_filename, title_prefix):
     )
     plt.tight_layout()
     plt.savefig(output_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
     print(f"Plot saved to {output_filename}")
 
     # Print summary statistics
@@ -190,15 +253,20 @@ def create_analysis_plots(sessions, output_filename, title_prefix):
     print(
         f"  Worst: {max(sec_per_pallet):.2f}s (Session {session_ids[sec_per_pallet.index(max(sec_per_pallet))]})"
     )
+    if anomalies:
+        print(f"\nAnomalies ({len(anomalies)} session(s)):")
+        for sid in sorted(anomalies):
+            for alert in anomalies[sid]:
+                print(f"  {alert}")
     print("=" * 60 + "\n")
 
 
 # Main execution
 if __name__ == "__main__":
     # Process sessions_23.txt
-    if os.path.exists(SESSION_23_PATH):
-        print(f"Processing {SESSION_23_PATH}...")
-        sessions_23 = parse_session_file(SESSION_23_PATH)
+    if os.path.exists(LOG_23_PATH) or os.path.exists(SESSION_23_PATH):
+        print("Processing 2026-01-23...")
+        sessions_23 = load_sessions(LOG_23_PATH, SESSION_23_PATH)
         create_analysis_plots(
             sessions_23, 
             "session_analysis_23.png",  # Save in current directory
@@ -208,9 +276,9 @@ if __name__ == "__main__":
         print(f"File not found: {SESSION_23_PATH}")
 
     # Process sessions_24.txt
-    if os.path.exists(SESSION_24_PATH):
-        print(f"Processing {SESSION_24_PATH}...")
-        sessions_24 = parse_session_file(SESSION_24_PATH)
+    if os.path.exists(LOG_24_PATH) or os.path.exists(SESSION_24_PATH):
+        print("Processing 2026-01-24...")
+        sessions_24 = load_sessions(LOG_24_PATH, SESSION_24_PATH)
         create_analysis_plots(
             sessions_24, 
             "session_analysis_24.png",  # Save in current directory
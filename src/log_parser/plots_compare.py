@@ -1,14 +1,30 @@
 import matplotlib.pyplot as plt
 import os
+from datetime import datetime, timedelta
+
+from log_parser.metric_store import MetricStore, Rollup
+from log_parser.session_cache import cached_read_log, to_plot_sessions
 
 # ============================================================================
 # EDIT THESE FILE PATHS
 # ============================================================================
 SESSION_23_PATH = "/home/dhruvkumarjiguda/code/log_parser/sessions_23.txt"
 SESSION_24_PATH = "/home/dhruvkumarjiguda/code/log_parser/sessions_24.txt"
+# Raw logs are preferred when present (parsed once, shared via the session cache)
+LOG_23_PATH = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-23/App.log"
+LOG_24_PATH = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log"
+# Long-range history (see metric_store.py)
+STORE_PATH = "/home/dhruvkumarjiguda/code/log_parser/metric_store"
 # ============================================================================
 
 
+def load_sessions(log_path, session_path):
+    """Sessions from the raw log if available, else from the text export"""
+    if os.path.exists(log_path):
+        return to_plot_sessions(cached_read_log(log_path))
+    return parse_session_file(session_path)
+
+
 def parse_session_file(filepath):
     """Parse session data from txt file"""
     sessions = []
@@ -96,7 +112,9 @@ def plot_pallets_produced(sessions, ax, title):
     ax.invert_yaxis()  # Highest session ID at top
 
 
-def create_uph_comparison(sessions_23, sessions_24, output_filename):
+def create_uph_comparison(
+    sessions_23, sessions_24, output_filename, labels=("2026-01-23", "2026-01-24")
+):
     """Create side-by-side Rolling UPH comparison"""
 
     if not sessions_23 or not sessions_24:
@@ -107,21 +125,24 @@ def create_uph_comparison(sessions_23, sessions_24, output_filename):
     fig, axes = plt.subplots(1, 2, figsize=(16, 6))
 
     # Rolling UPH plots
-    plot_rolling_uph(sessions_23, axes[0], "2026-01-23")
-    plot_rolling_uph(sessions_24, axes[1], "2026-01-24")
+    plot_rolling_uph(sessions_23, axes[0], labels[0])
+    plot_rolling_uph(sessions_24, axes[1], labels[1])
 
     plt.suptitle(
-        "Rolling UPH Comparison: 2026-01-23 vs 2026-01-24",
+        f"Rolling UPH Comparison: {labels[0]} vs {labels[1]}",
         fontsize=16,
         fontweight="bold",
         y=1.00,
     )
     plt.tight_layout()
     plt.savefig(output_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
     print(f"UPH comparison plot saved to {output_filename}")
 
 
-def create_pallets_comparison(sessions_23, sessions_24, output_filename):
+def create_pallets_comparison(
+    sessions_23, sessions_24, output_filename, labels=("2026-01-23", "2026-01-24")
+):
     """Create side-by-side Pallets Produced comparison"""
 
     if not sessions_23 or not sessions_24:
@@ -132,17 +153,18 @@ def create_pallets_comparison(sessions_23, sessions_24, output_filename):
     fig, axes = plt.subplots(1, 2, figsize=(16, 6))
 
     # Pallets Produced plots
-    plot_pallets_produced(sessions_23, axes[0], "2026-01-23")
-    plot_pallets_produced(sessions_24, axes[1], "2026-01-24")
+    plot_pallets_produced(sessions_23, axes[0], labels[0])
+    plot_pallets_produced(sessions_24, axes[1], labels[1])
 
     plt.suptitle(
-        "Pallets Produced Comparison: 2026-01-23 vs 2026-01-24",
+        f"Pallets Produced Comparison: {labels[0]} vs {labels[1]}",
         fontsize=16,
         fontweight="bold",
         y=1.00,
     )
     plt.tight_layout()
     plt.savefig(output_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
     print(f"Pallets comparison plot saved to {output_filename}")
 
 
@@ -162,25 +184,75 @@ def create_individual_plot(sessions, output_filename, title, plot_type="rolling_
 
     plt.tight_layout()
     plt.savefig(output_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
     print(f"Individual plot saved to {output_filename}")
 
 
+def plot_uph_history(store, start, end, ax, title, resolution=None):
+    """Plot Rolling UPH over [start, end) from the metric store"""
+    points = store.query(start, end, resolution)
+    if not points:
+        ax.set_title(f"{title}\nNo samples in range", fontsize=14)
+        return
+
+    times = [p.timestamp for p in points]
+    if isinstance(points[0], Rollup):
+        means = [p.rolling_uph_mean for p in points]
+        ax.plot(times, means, label="Rolling UPH (mean)")
+        ax.fill_between(
+            times,
+            [p.rolling_uph_min for p in points],
+            [p.rolling_uph_max for p in points],
+            alpha=0.2,
+            label="Rolling UPH (min-max)",
+        )
+        ax.plot(times, [p.uph for p in points], alpha=0.7, label="Produced UPH")
+    else:
+        ax.plot(times, [p.rolling_uph for p in points], label="Rolling UPH")
+
+    ax.set_xlabel("Time", fontsize=12)
+    ax.set_ylabel("UPH (Units Per Hour)", fontsize=12)
+    ax.set_title(f"{title}\nRolling UPH History", fontsize=14, fontweight="bold")
+    ax.legend(fontsize=10)
+    ax.grid(True, alpha=0.3)
+
+
+def create_history_comparison(store, ranges, output_filename, resolution=None):
+    """
+    Side-by-side UPH history for several (label, start, end) ranges. The
+    store picks raw samples or minute/hour rollups from the span unless
+    resolution is given.
+    """
+    fig, axes = plt.subplots(1, len(ranges), figsize=(8 * len(ranges), 6))
+    if len(ranges) == 1:
+        axes = [axes]
+    for ax, (label, start, end) in zip(axes, ranges):
+        plot_uph_history(store, start, end, ax, label, resolution)
+
+    plt.suptitle("Rolling UPH History", fontsize=16, fontweight="bold", y=1.00)
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    plt.savefig(output_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
+    print(f"History comparison plot saved to {output_filename}")
+
+
 # Main execution
 if __name__ == "__main__":
     sessions_23 = None
     sessions_24 = None
 
     # Load session files
-    if os.path.exists(SESSION_23_PATH):
-        print(f"Loading {SESSION_23_PATH}...")
-        sessions_23 = parse_session_file(SESSION_23_PATH)
+    if os.path.exists(LOG_23_PATH) or os.path.exists(SESSION_23_PATH):
+        print("Loading 2026-01-23...")
+        sessions_23 = load_sessions(LOG_23_PATH, SESSION_23_PATH)
         print(f"  Found {len(sessions_23)} productive sessions")
     else:
         print(f"File not found: {SESSION_23_PATH}")
 
-    if os.path.exists(SESSION_24_PATH):
-        print(f"Loading {SESSION_24_PATH}...")
-        sessions_24 = parse_session_file(SESSION_24_PATH)
+    if os.path.exists(LOG_24_PATH) or os.path.exists(SESSION_24_PATH):
+        print("Loading 2026-01-24...")
+        sessions_24 = load_sessions(LOG_24_PATH, SESSION_24_PATH)
         print(f"  Found {len(sessions_24)} productive sessions")
     else:
         print(f"File not found: {SESSION_24_PATH}")
@@ -193,6 +265,20 @@ if __name__ == "__main__":
         print("Creating Pallets comparison...")
         create_pallets_comparison(sessions_23, sessions_24, "pallets_comparison.png")
 
+    # History comparison from the metric store
+    if os.path.exists(STORE_PATH):
+        print("Creating history comparison...")
+        day_23 = datetime(2026, 1, 23)
+        day_24 = datetime(2026, 1, 24)
+        create_history_comparison(
+            MetricStore(STORE_PATH),
+            [
+                ("2026-01-23", day_23, day_23 + timedelta(days=1)),
+                ("2026-01-24", day_24, day_24 + timedelta(days=1)),
+            ],
+            "uph_history_comparison.png",
+        )
+
     # Create individual plots if you want them
     # Uncomment these lines to create individual plots:
 
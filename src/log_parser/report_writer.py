@@ -0,0 +1,251 @@
+import csv
+import json
+import os
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Flush to disk once this many characters are pending
+DEFAULT_BUFFER_SIZE = 1 << 20
+# Lines writelines() joins into one pending chunk
+LINES_PER_JOIN = 512
+
+SEPARATOR = "=" * 100
+RULE = "-" * 100
+SESSION_RULE = "-" * 40
+
+# Templates are filled with str.format, so only {namespace}/{count} are fields
+ERROR_FILE_HEADER = (
+    SEPARATOR + "\n"
+    "ERROR LOGS FOR: {namespace}\n" + SEPARATOR + "\n"
+    "Total errors: {count}\n" + SEPARATOR + "\n\n"
+)
+ERROR_FILE_FOOTER = (
+    "\n" + SEPARATOR + "\n"
+    "END OF LOG - Total: {count} error(s)\n" + SEPARATOR + "\n"
+)
+EMPTY_ERROR_FILE = (
+    SEPARATOR + "\n"
+    "ERROR LOGS FOR: {namespace}\n" + SEPARATOR + "\n"
+    "Total errors: 0\n" + SEPARATOR + "\n\n"
+    "*** NO ERROR LOGS FOUND FOR THIS NAMESPACE ***\n\n"
+    + SEPARATOR + "\n" + SEPARATOR + "\n"
+)
+SUMMARY_ENTRY = "{namespace}\n  Count: {count} error(s)\n\n"
+
+
+class ReportWriter:
+    """Collect formatted text and hand it to the file in large writes."""
+
+    def __init__(
+        self,
+        output_file: str,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        encoding: str = "utf-8",
+    ):
+        self.output_file = output_file
+        self.buffer_size = buffer_size
+        self._f = open(
+            output_file, "w", encoding=encoding, newline="", buffering=buffer_size
+        )
+        self._chunks: List[str] = []
+        self._pending = 0
+
+    def write(self, text: str) -> int:
+        self._chunks.append(text)
+        self._pending += len(text)
+        if self._pending >= self.buffer_size:
+            self.flush()
+        return len(text)
+
+    def writelines(self, lines: Iterable[str]):
+        # Hot path for generators: take lines in slices so joining and
+        # accounting happen once per slice, not once per line
+        lines = iter(lines)
+        while True:
+            batch = list(islice(lines, LINES_PER_JOIN))
+            if not batch:
+                break
+            self.write("".join(batch))
+
+    def flush(self):
+        if self._chunks:
+            self._f.write("".join(self._chunks))
+            self._chunks.clear()
+            self._pending = 0
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def format_session(s) -> str:
+    """
+    Render one session in the sessions_XX.txt layout. Formatting dominates
+    the cost of a session report, so the text output is no faster than the
+    original per-session writer; buffering pays off for the error files.
+    """
+    uph = "None" if s.uph is None else f"{s.uph:.2f}"
+    spp = "None" if s.seconds_per_pallet is None else f"{s.seconds_per_pallet:.2f}"
+    init_time = "None" if s.init_total_time is None else f"{s.init_total_time:.2f}"
+    final_time = "None" if s.final_total_time is None else f"{s.final_total_time:.2f}"
+    return (
+        f"Session {s.session_id}\n"
+        f"Date: {s.date}\n"
+        f"Start Time: {s.start_time}\n"
+        f"End Time: {s.end_time}\n"
+        f"Pallets Produced: {s.pallets_produced}\n"
+        f"Init Total Time: {init_time}\n"
+        f"Final Total Time: {final_time}\n"
+        f"UPH: {uph}\n"
+        f"Seconds per Pallet: {spp}\n"
+        f"Init Rolling UPH: {s.init_rolling_uph}\n"
+        f"Final Rolling UPH: {s.final_rolling_uph}\n"
+        f"{SESSION_RULE}\n"
+    )
+
+
+def format_error_file(namespace: str, logs: List[str]) -> str:
+    """Render a complete per-namespace error file"""
+    if not logs:
+        return EMPTY_ERROR_FILE.format(namespace=namespace)
+    count = len(logs)
+    return "".join(
+        (
+            ERROR_FILE_HEADER.format(namespace=namespace, count=count),
+            "\n".join(logs),
+            "\n",
+            ERROR_FILE_FOOTER.format(count=count),
+        )
+    )
+
+
+def format_error_summary(
+    error_counts: Dict[str, int], all_namespaces: Iterable[str]
+) -> str:
+    """Render _SUMMARY.txt from per-namespace error counts"""
+    all_namespaces = set(all_namespaces)
+    with_errors = sorted(error_counts)
+    without_errors = sorted(all_namespaces - set(error_counts))
+
+    parts = [f"{SEPARATOR}\nERROR LOG SUMMARY\n{SEPARATOR}\n\n"]
+    parts.append(f"NAMESPACES WITH ERRORS:\n{RULE}\n")
+    parts.extend(
+        SUMMARY_ENTRY.format(namespace=ns, count=error_counts[ns]) for ns in with_errors
+    )
+    parts.append(f"\n{SEPARATOR}\n\n")
+    parts.append(f"NAMESPACES WITHOUT ERRORS:\n{RULE}\n")
+    if without_errors:
+        parts.extend(
+            SUMMARY_ENTRY.format(namespace=ns, count=0) for ns in without_errors
+        )
+    else:
+        parts.append("(None)\n\n")
+    parts.append(
+        f"{SEPARATOR}\n"
+        f"Total unique namespaces: {len(all_namespaces)}\n"
+        f"Namespaces with errors: {len(with_errors)}\n"
+        f"Namespaces without errors: {len(without_errors)}\n"
+        f"Total error logs: {sum(error_counts.values())}\n"
+        f"{SEPARATOR}\n"
+    )
+    return "".join(parts)
+
+
+class _Counter:
+    """Iterator wrapper that counts what passes through it"""
+
+    def __init__(self, iterable: Iterable[Any]):
+        self._it = iter(iterable)
+        self.count = 0
+
+    def __iter__(self):
+        for item in self._it:
+            self.count += 1
+            yield item
+
+
+def record_to_dict(record: Any) -> Dict[str, Any]:
+    """Turn a dataclass instance (or mapping) into a plain dict"""
+    if isinstance(record, dict):
+        return record
+    return dict(vars(record))
+
+
+def write_records(
+    records: Iterable[Any],
+    output_file: str,
+    fmt: str = "text",
+    formatter: Optional[Callable[[Any], str]] = None,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> int:
+    """
+    Stream records from any iterable (usually a generator) into one file.
+
+    Args:
+        records: Sessions, error records or dicts
+        output_file: Path to the output file
+        fmt: "text", "jsonl" or "csv"
+        formatter: Record -> str, required for "text"
+        buffer_size: Characters held in memory between writes
+
+    Returns:
+        Number of records written
+    """
+    # Validate before opening, so a bad call does not truncate output_file
+    if fmt not in ("text", "jsonl", "csv"):
+        raise ValueError(f"Unknown report format: {fmt}")
+    if fmt == "text" and formatter is None:
+        raise ValueError("formatter is required for text output")
+
+    count = 0
+    with ReportWriter(output_file, buffer_size=buffer_size) as writer:
+        if fmt == "text":
+            if hasattr(records, "__len__"):
+                writer.writelines(map(formatter, records))
+                count = len(records)
+            else:
+                counted = _Counter(records)
+                writer.writelines(map(formatter, counted))
+                count = counted.count
+        elif fmt == "jsonl":
+            dumps = json.JSONEncoder(separators=(",", ":")).encode
+            counted = _Counter(records)
+            writer.writelines(dumps(record_to_dict(r)) + "\n" for r in counted)
+            count = counted.count
+        elif fmt == "csv":
+            csv_writer = None
+            for record in records:
+                row = record_to_dict(record)
+                if csv_writer is None:
+                    csv_writer = csv.DictWriter(
+                        writer, fieldnames=list(row), lineterminator="\n"
+                    )
+                    csv_writer.writeheader()
+                csv_writer.writerow(row)
+                count += 1
+    return count
+
+
+def iter_error_records(error_groups: Dict[str, List[str]]):
+    """Yield one dict per error line, namespace by namespace"""
+    for namespace in sorted(error_groups):
+        for line in error_groups[namespace]:
+            yield {"namespace": namespace, "line": line}
+
+
+def format_for_extension(output_file: str) -> str:
+    """Pick a sink format from the file extension"""
+    ext = os.path.splitext(output_file)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    return "text"
@@ -0,0 +1,299 @@
+import json
+import os
+import re
+import tomllib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from log_parser.log_reader import iter_lines
+from log_parser.uph_parser import TIMESTAMP_RE
+
+RULE_KINDS = ("field", "counter", "session_start", "session_end")
+
+FIELD_TYPES: Dict[str, Callable[[str], object]] = {
+    "int": int,
+    "float": float,
+    "str": str,
+}
+
+# Built-in rules: the patterns read_log and the error splitter hardcode,
+# plus a couple of KPIs that previously needed their own loop
+DEFAULT_RULES = {
+    "rules": [
+        {
+            "name": "init",
+            "kind": "session_start",
+            "pattern": r"Application initialized",
+        },
+        {
+            "name": "metrics",
+            "kind": "field",
+            "pattern": r"TotalUnits:\s*(?P<total_units>\d+).*?"
+            r"Rolling UPH:\s*(?P<rolling_uph>\d+).*?"
+            r"TotalTime:\s*(?P<total_time>\d+(?:\.\d+)?)",
+            "fields": {
+                "total_units": "int",
+                "rolling_uph": "int",
+                "total_time": "float",
+            },
+        },
+        {
+            "name": "do_write_failed",
+            "kind": "counter",
+            "pattern": r"Failed to write DO channel (?P<channel>\d+)",
+            "fields": {"channel": "int"},
+        },
+        {
+            "name": "login_prompt",
+            "kind": "counter",
+            "pattern": r"[Ll]ogin",
+            "literal": "ogin",
+        },
+        {
+            "name": "error",
+            "kind": "counter",
+            "pattern": r"\[\d+\]\s+ERROR\s+(?P<namespace>[\w\.]+)\s+-",
+            "fields": {"namespace": "str"},
+        },
+    ]
+}
+
+_META = set(".^$*+?{}[]()|")
+_QUANTIFIERS = set("*?{")
+_ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+_OCTAL = set("01234567")
+
+
+def _escape_end(pattern: str, i: int) -> int:
+    """Index just past the alphanumeric escape starting at pattern[i]"""
+    nxt = pattern[i + 1]
+    end = i + 2
+    if nxt in _ESCAPE_DIGITS:
+        return min(end + _ESCAPE_DIGITS[nxt], len(pattern))
+    if nxt == "N" and pattern.startswith("{", end):
+        close = pattern.find("}", end)
+        return close + 1 if close != -1 else len(pattern)
+    if nxt == "0":
+        # \0 plus up to two more octal digits
+        while end < min(i + 4, len(pattern)) and pattern[end] in _OCTAL:
+            end += 1
+    elif nxt.isdigit():
+        # Three octal digits are a character, otherwise a group reference
+        digits = pattern[i + 1 : i + 4]
+        if len(digits) == 3 and all(c in _OCTAL for c in digits):
+            return i + 4
+        if end < len(pattern) and pattern[end].isdigit():
+            end += 1
+    return end
+
+
+def guess_literal(pattern: str) -> Optional[str]:
+    """
+    Longest run of characters every match must contain, or None when the
+    pattern has no safe literal (top-level alternation, classes only, ...).
+    """
+    runs: List[str] = []
+    run: List[str] = []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            if nxt.isalnum():
+                # \d, \s, \w ... are classes, and \x41, \N{...}, \1 are
+                # not their own text: end the run after the whole escape
+                runs.append("".join(run))
+                run = []
+                i = _escape_end(pattern, i)
+                continue
+            if depth == 0:
+                run.append(nxt)
+            i += 2
+            continue
+        if c == "|" and depth == 0:
+            return None
+        if c in _QUANTIFIERS and run:
+            # The previous character is optional or repeated
+            run.pop()
+        if c == "{":
+            # Skip the {m,n} repeat count
+            end = pattern.find("}", i)
+            i = end + 1 if end != -1 else len(pattern)
+            runs.append("".join(run))
+            run = []
+            continue
+        if c in _META:
+            if c in "([":
+                depth += 1
+            elif c in ")]":
+                depth = max(depth - 1, 0)
+            runs.append("".join(run))
+            run = []
+        elif depth == 0:
+            run.append(c)
+        else:
+            runs.append("".join(run))
+            run = []
+        i += 1
+    runs.append("".join(run))
+    best = max(runs, key=len)
+    return best if len(best) >= 3 else None
+
+
+@dataclass
+class Rule:
+    name: str
+    kind: str
+    pattern: str
+    fields: Dict[str, str] = field(default_factory=dict)
+    literal: Optional[str] = None
+    regex: Optional[re.Pattern] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.kind not in RULE_KINDS:
+            raise ValueError(f"Rule {self.name}: unknown kind '{self.kind}'")
+        for name, type_name in self.fields.items():
+            if type_name not in FIELD_TYPES:
+                raise ValueError(f"Rule {self.name}: unknown type for {name}")
+        self.regex = re.compile(self.pattern)
+        missing = [name for name in self.fields if name not in self.regex.groupindex]
+        if missing:
+            raise ValueError(
+                f"Rule {self.name}: no named group for {', '.join(missing)}"
+            )
+        # Case-folded or verbose (whitespace ignored) patterns: the pattern
+        # text is not the matched text, so there is no safe literal
+        if self.literal is None and not self.regex.flags & (
+            re.IGNORECASE | re.VERBOSE
+        ):
+            self.literal = guess_literal(self.pattern)
+
+    def extract(self, match: re.Match) -> Dict[str, object]:
+        return {
+            name: FIELD_TYPES[type_name](match[name])
+            for name, type_name in self.fields.items()
+            if match[name] is not None
+        }
+
+
+@dataclass
+class ScanResult:
+    counters: Counter = field(default_factory=Counter)
+    # rule name -> [{"date", "time", **fields}, ...]
+    events: Dict[str, List[dict]] = field(default_factory=lambda: defaultdict(list))
+    # (kind, date, time) for session_start / session_end rules
+    boundaries: List[Tuple[str, Optional[str], Optional[str]]] = field(
+        default_factory=list
+    )
+    lines: int = 0
+
+
+class RuleSet:
+    """
+    All rules compiled into one matcher.
+
+    Every rule's literal goes into a single alternation: one C-level search
+    gates each line, and the hits it finds (each implying the literals it
+    contains) select the rules to dispatch, without testing every literal.
+    Rules without a usable literal are tried on every line.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        self._by_literal: Dict[str, List[Tuple[int, Rule]]] = defaultdict(list)
+        self._always: List[Rule] = []
+        for i, rule in enumerate(self.rules):
+            if rule.literal:
+                self._by_literal[rule.literal].append((i, rule))
+            else:
+                self._always.append(rule)
+        literals = sorted(self._by_literal, key=len, reverse=True)
+        # Where several literals start at one position the alternation reports
+        # the longest; every literal inside a found one is present as well
+        self._implied = {
+            outer: [inner for inner in literals if inner in outer] for outer in literals
+        }
+        self._gate = None
+        if literals:
+            self._gate = re.compile("|".join(map(re.escape, literals)))
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RuleSet":
+        return cls(Rule(**rule) for rule in config["rules"])
+
+    def candidates(self, line: str) -> List[Rule]:
+        if self._gate is None:
+            return list(self._always)
+        m = self._gate.search(line)
+        if m is None:
+            return list(self._always)
+        # Restart one character past each hit, so overlapping literals are
+        # found too; literal hits are few per line
+        search = self._gate.search
+        present = set()
+        while m is not None:
+            present.update(self._implied[m.group()])
+            m = search(line, m.start() + 1)
+        by_literal = self._by_literal
+        if len(present) == 1:
+            gated = by_literal[present.pop()]
+        else:
+            gated = sorted(r for literal in present for r in by_literal[literal])
+        return self._always + [rule for _, rule in gated]
+
+    def scan(self, lines: Iterable[str]) -> ScanResult:
+        """Apply every rule to every line in a single pass"""
+        result = ScanResult()
+        counters = result.counters
+        events = result.events
+        for line in lines:
+            result.lines += 1
+            rules = self.candidates(line)
+            if not rules:
+                continue
+            ts = None
+            for rule in rules:
+                m = rule.regex.search(line)
+                if m is None:
+                    continue
+                if ts is None:
+                    ts = TIMESTAMP_RE.match(line) or False
+                date = ts["date"] if ts else None
+                time = ts["time"] if ts else None
+                counters[rule.name] += 1
+                if rule.kind in ("session_start", "session_end"):
+                    result.boundaries.append((rule.kind, date, time))
+                elif rule.kind == "field" or rule.fields:
+                    events[rule.name].append(
+                        {"date": date, "time": time, **rule.extract(m)}
+                    )
+        return result
+
+    def scan_file(self, file_path: str) -> ScanResult:
+        return self.scan(iter_lines(file_path))
+
+
+def load_rules(config_path: Optional[str] = None) -> RuleSet:
+    """Load a rule config (.toml or .json); None gives DEFAULT_RULES"""
+    if config_path is None:
+        return RuleSet.from_config(DEFAULT_RULES)
+    if os.path.splitext(config_path)[1].lower() == ".toml":
+        with open(config_path, "rb") as f:
+            config = tomllib.load(f)
+    else:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    return RuleSet.from_config(config)
+
+
+if __name__ == "__main__":
+    # Configuration - Change these to your file names
+    input_log = "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log"
+    rules_file = None  # e.g. "rules.toml"
+
+    result = load_rules(rules_file).scan_file(input_log)
+    print(f"Scanned {result.lines} lines")
+    for name, count in result.counters.most_common():
+        print(f"  {name}: {count}")
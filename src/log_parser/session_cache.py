@@ -0,0 +1,199 @@
+import copy
+import glob
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from log_parser.log_reader import iter_lines
+from log_parser.report_writer import record_to_dict
+from log_parser.uph_parser import PARSER_VERSION, iter_sessions, session
+
+# Override with the LOG_PARSER_CACHE environment variable
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "log_parser")
+MEMORY_CACHE_SIZE = 32
+# On-disk entries kept; every appended log gets a new key, so without a
+# cap a polled live log leaves one file per change behind
+DISK_CACHE_SIZE = 64
+DISK_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+
+_memory: "OrderedDict[str, List[session]]" = OrderedDict()
+# path -> (size, mtime_ns, digest), so unchanged files are hashed once per process
+_digests: Dict[str, Tuple[int, int, str]] = {}
+
+
+def cache_dir() -> str:
+    return os.environ.get("LOG_PARSER_CACHE", DEFAULT_CACHE_DIR)
+
+
+def file_digest(file_path: str) -> str:
+    """BLAKE2b of the file contents (memoized on size + mtime)"""
+    st = os.stat(file_path)
+    known = _digests.get(file_path)
+    if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+        return known[2]
+
+    h = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _digests[file_path] = (st.st_size, st.st_mtime_ns, digest)
+    return digest
+
+
+def cache_key(file_paths: Sequence[str]) -> str:
+    """Content key for one log or an ordered range of logs"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"sessions-v{PARSER_VERSION}".encode())
+    for path in file_paths:
+        h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+def _disk_path(key: str) -> str:
+    return os.path.join(cache_dir(), f"sessions-{key}.json")
+
+
+def _load_disk(key: str) -> Optional[List[session]]:
+    path = _disk_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            sessions = [session(**row) for row in json.load(f)]
+    except (OSError, ValueError, TypeError):
+        return None
+    try:
+        # Mark as recently used for prune_disk_cache
+        os.utime(path)
+    except OSError:
+        pass
+    return sessions
+
+
+def _store_disk(key: str, sessions: List[session]):
+    path = _disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([record_to_dict(s) for s in sessions], f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Warning: could not write session cache {path}: {e}")
+        return
+    prune_disk_cache()
+
+
+def prune_disk_cache(
+    max_entries: Optional[int] = None, max_age: Optional[float] = None
+) -> int:
+    """
+    Remove on-disk entries older than max_age seconds (since last use), then
+    the least recently used ones beyond max_entries. Defaults are
+    DISK_CACHE_MAX_AGE and DISK_CACHE_SIZE. Returns how many were removed.
+    """
+    if max_entries is None:
+        max_entries = DISK_CACHE_SIZE
+    if max_age is None:
+        max_age = DISK_CACHE_MAX_AGE
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir(), "sessions-*.json")):
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            pass  # removed by another process
+    entries.sort(reverse=True)
+    cutoff = time.time() - max_age
+    stale = [
+        path
+        for i, (mtime, path) in enumerate(entries)
+        if i >= max_entries or mtime < cutoff
+    ]
+    removed = 0
+    for path in stale:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _copies(sessions: List[session]) -> List[session]:
+    # Session fields are all immutable scalars, so copying each record is a
+    # deep copy: callers can edit what they get without touching the cache
+    return [copy.copy(s) for s in sessions]
+
+
+def _remember(key: str, sessions: List[session]):
+    _memory[key] = sessions
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_CACHE_SIZE:
+        _memory.popitem(last=False)
+
+
+def cached_read_log(
+    file_paths: Union[str, Sequence[str]], use_disk: bool = True
+) -> List[session]:
+    """
+    Same result as read_log, parsed at most once per log content.
+
+    Args:
+        file_paths: A log file, or a list of consecutive logs parsed as one
+            stream (sessions may span files)
+        use_disk: Also read/write the on-disk tier
+
+    Lookups go memory LRU -> disk -> parse. The key is the content hash of
+    the input plus PARSER_VERSION, so edited logs or a changed parser never
+    return stale sessions. Every call returns its own copies of the sessions.
+    The disk tier keeps the DISK_CACHE_SIZE most recently used entries.
+    """
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    key = cache_key(file_paths)
+
+    sessions = _memory.get(key)
+    if sessions is not None:
+        _memory.move_to_end(key)
+        return _copies(sessions)
+
+    sessions = _load_disk(key) if use_disk else None
+    if sessions is None:
+        lines = itertools.chain.from_iterable(iter_lines(p) for p in file_paths)
+        sessions = list(iter_sessions(lines))
+        if use_disk:
+            _store_disk(key, sessions)
+
+    _remember(key, sessions)
+    return _copies(sessions)
+
+
+def clear_memory_cache():
+    _memory.clear()
+    _digests.clear()
+
+
+def to_plot_sessions(sessions: List[session]) -> List[dict]:
+    """
+    Convert parsed sessions to the dicts the plotting scripts use, keeping
+    the same filter and 2-decimal rounding as going through sessions_XX.txt.
+    """
+    plot_sessions = []
+    for s in sessions:
+        if s.pallets_produced <= 0 or s.uph is None:
+            continue
+        row = {
+            "session_id": s.session_id,
+            "start_time": s.start_time,
+            "pallets": s.pallets_produced,
+            "uph": float(f"{s.uph:.2f}"),
+        }
+        if s.seconds_per_pallet is not None:
+            row["sec_per_pallet"] = float(f"{s.seconds_per_pallet:.2f}")
+        if s.final_rolling_uph is not None:
+            row["rolling_uph"] = s.final_rolling_uph
+        plot_sessions.append(row)
+    return plot_sessions
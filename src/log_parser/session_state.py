@@ -0,0 +1,347 @@
+"""
+Resumable session state machine.
+
+A log is summarised as a list of segments: an optional *prefix* (lines
+before the first "Application initialized" seen in this piece of input)
+followed by one segment per init. Segment statistics combine
+associatively, so summaries of consecutive chunks merge into exactly the
+summary of the concatenated input. Sessions are only numbered and
+finalised once their closing boundary is known.
+
+Compared with read_log (legacy=False):
+  * a log that starts mid-session gets an implicit session for the
+    metrics before the first init instead of dropping them
+  * a session interrupted by a restart ends at the last line logged
+    before the new init, not at the init itself
+  * a TotalUnits / TotalTime counter that goes backwards is treated as a
+    reset: production is summed per run instead of last - first
+  * end_date is recorded, so sessions crossing midnight keep their date
+
+legacy=True reproduces read_log exactly.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from log_parser.log_reader import iter_line_range, iter_lines, split_ranges
+from log_parser.uph_parser import INIT_RE, METRICS_RE, TIMESTAMP_RE, session
+
+Stamp = Optional[Tuple[str, str]]  # (date, time)
+
+
+@dataclass
+class Segment:
+    is_init: bool = False
+    start: Stamp = None  # timestamp of the init (None for a prefix)
+    first_seen: Stamp = None  # first timestamp seen after the start
+    last_seen: Stamp = None  # last timestamp seen, init line included
+    count: int = 0  # metrics lines
+    first_units: Optional[int] = None
+    first_time: Optional[float] = None
+    first_rolling: Optional[int] = None
+    last_units: Optional[int] = None
+    last_time: Optional[float] = None
+    last_rolling: Optional[int] = None
+    # Counter values just before each reset; keeps every statistic exact
+    # and order-independent (ints add exactly, floats are fsum'd at the end)
+    reset_units: int = 0
+    reset_times: List[float] = field(default_factory=list)
+
+    def copy(self) -> "Segment":
+        return replace(self, reset_times=list(self.reset_times))
+
+    def see(self, stamp: Tuple[str, str]):
+        if self.first_seen is None:
+            self.first_seen = stamp
+        self.last_seen = stamp
+
+    def add_metrics(self, units: int, total_time: float, rolling: int):
+        if self.count == 0:
+            self.first_units = units
+            self.first_time = total_time
+            self.first_rolling = rolling
+        else:
+            self._add_deltas(self.last_units, self.last_time, units, total_time)
+        self.count += 1
+        self.last_units = units
+        self.last_time = total_time
+        self.last_rolling = rolling
+
+    def _add_deltas(self, prev_units, prev_time, units, total_time):
+        # A counter that goes backwards restarted from zero
+        if units < prev_units:
+            self.reset_units += prev_units
+        if total_time < prev_time:
+            self.reset_times.append(prev_time)
+
+    def absorb(self, other: "Segment"):
+        """Append a segment that follows this one and has no init of its own"""
+        if other.first_seen is not None:
+            if self.first_seen is None:
+                self.first_seen = other.first_seen
+            self.last_seen = other.last_seen
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.first_units = other.first_units
+            self.first_time = other.first_time
+            self.first_rolling = other.first_rolling
+        else:
+            self._add_deltas(
+                self.last_units, self.last_time, other.first_units, other.first_time
+            )
+        self.count += other.count
+        self.reset_units += other.reset_units
+        self.reset_times = self.reset_times + other.reset_times
+        self.last_units = other.last_units
+        self.last_time = other.last_time
+        self.last_rolling = other.last_rolling
+
+
+@dataclass
+class ChunkSummary:
+    """Everything needed to merge a chunk with its neighbours"""
+
+    segments: List[Segment] = field(default_factory=lambda: [Segment()])
+    last_seen: Stamp = None
+
+    @property
+    def prefix(self) -> Segment:
+        return self.segments[0]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChunkSummary":
+        segments = []
+        for seg in data["segments"]:
+            seg = dict(seg)
+            for key in ("start", "first_seen", "last_seen"):
+                if seg[key] is not None:
+                    seg[key] = tuple(seg[key])
+            segments.append(Segment(**seg))
+        last = data["last_seen"]
+        return cls(segments=segments, last_seen=tuple(last) if last else None)
+
+
+def _feed_line(summary: ChunkSummary, line: str):
+    ts = TIMESTAMP_RE.match(line)
+    stamp = (ts["date"], ts["time"]) if ts else None
+
+    if INIT_RE.search(line):
+        # With no timestamp yet in this chunk the start is resolved on merge
+        summary.segments.append(
+            Segment(is_init=True, start=stamp or summary.last_seen)
+        )
+
+    current = summary.segments[-1]
+    if stamp:
+        summary.last_seen = stamp
+        current.see(stamp)
+
+    metrics = METRICS_RE.search(line)
+    if metrics:
+        current.add_metrics(
+            int(metrics["total_units"]),
+            float(metrics["total_time"]),
+            int(metrics["rolling_uph"]),
+        )
+
+
+def scan_chunk(lines: Iterable[str]) -> ChunkSummary:
+    """Summarise a piece of log without any knowledge of what came before"""
+    summary = ChunkSummary()
+    for line in lines:
+        _feed_line(summary, line)
+    return summary
+
+
+def merge(left: ChunkSummary, right: ChunkSummary) -> ChunkSummary:
+    """Summary of left's input followed by right's input (associative)"""
+    segments = [seg.copy() for seg in left.segments]
+    tail = segments[-1]
+    tail.absorb(right.segments[0])
+
+    for seg in right.segments[1:]:
+        seg = seg.copy()
+        if seg.is_init and seg.start is None:
+            # Nothing in right was dated before this init; read_log would
+            # date it with the last timestamp on the left, if there is one
+            seg.start = left.last_seen
+        segments.append(seg)
+
+    return ChunkSummary(
+        segments=segments, last_seen=right.last_seen or left.last_seen
+    )
+
+
+def _resolved(segments: List[Segment]) -> List[Segment]:
+    """Drop inits that could never be dated (read_log skips them)"""
+    resolved = [segments[0].copy()]
+    for seg in segments[1:]:
+        if seg.is_init and seg.start is None:
+            resolved[-1].absorb(seg)
+        else:
+            resolved.append(seg.copy())
+    return resolved
+
+
+def _is_session(i: int, seg: Segment, legacy: bool) -> bool:
+    # The prefix only becomes a session (implicit start) outside legacy mode
+    if seg.is_init:
+        return True
+    return i == 0 and not legacy and seg.count > 0 and seg.first_seen is not None
+
+
+def _finalize(seg: Segment, session_id: int, end: Stamp, legacy: bool) -> session:
+    start = seg.start if seg.is_init else seg.first_seen
+    s = session(session_id=session_id, date=start[0], start_time=start[1])
+    s.end_time = end[1] if end else None
+    if not legacy and end:
+        s.end_date = end[0]
+
+    if seg.count == 0:
+        return s
+
+    s.init_total_time = seg.first_time
+    s.final_total_time = seg.last_time
+    s.init_rolling_uph = seg.first_rolling
+    s.final_rolling_uph = seg.last_rolling
+    if seg.count == 1:
+        # Only one metrics line - pallets = 1, time delta = None
+        s.pallets_produced = 1
+        return s
+
+    pallets = seg.last_units - seg.first_units
+    elapsed = seg.last_time - seg.first_time
+    if not legacy:
+        pallets += seg.reset_units
+        if seg.reset_times:
+            elapsed += math.fsum(seg.reset_times)
+    s.pallets_produced = pallets
+    if elapsed > 0 and pallets > 0:
+        s.uph = (pallets / elapsed) * 3600
+        s.seconds_per_pallet = elapsed / pallets
+    return s
+
+
+def _end(
+    seg: Segment, next_seg: Optional[Segment], last_seen: Stamp, legacy: bool
+) -> Stamp:
+    if not legacy:
+        # Last line logged before the next init (or the end of input)
+        return seg.last_seen
+    # read_log: the next init's timestamp, or the last timestamp overall
+    return next_seg.start if next_seg is not None else last_seen
+
+
+def finalize(
+    summary: ChunkSummary, legacy: bool = False, first_session_id: int = 1
+) -> List[session]:
+    """Turn the summary of a complete input into sessions"""
+    segs = _resolved(summary.segments)
+    sessions = []
+    for i, seg in enumerate(segs):
+        if not _is_session(i, seg, legacy):
+            continue
+        next_seg = segs[i + 1] if i + 1 < len(segs) else None
+        end = _end(seg, next_seg, summary.last_seen, legacy)
+        sessions.append(
+            _finalize(seg, first_session_id + len(sessions), end, legacy)
+        )
+    return sessions
+
+
+class SessionStateMachine:
+    """
+    Incremental parser: feed lines as they arrive, get sessions as they
+    close, checkpoint at any point with to_dict() and resume later with
+    from_dict(). Memory is bounded by the one open session.
+    """
+
+    def __init__(self, legacy: bool = False):
+        self.legacy = legacy
+        self.summary = ChunkSummary()
+        self.session_count = 0
+
+    def feed(self, lines: Iterable[str]) -> Iterator[session]:
+        for line in lines:
+            n = len(self.summary.segments)
+            _feed_line(self.summary, line)
+            if len(self.summary.segments) > n and self.summary.segments[-1].start:
+                yield from self._emit_closed()
+
+    def _emit_closed(self) -> Iterator[session]:
+        # Everything before the init that just opened is closed
+        segs = _resolved(self.summary.segments)
+        for i, seg in enumerate(segs[:-1]):
+            if _is_session(i, seg, self.legacy):
+                end = _end(seg, segs[i + 1], self.summary.last_seen, self.legacy)
+                self.session_count += 1
+                yield _finalize(seg, self.session_count, end, self.legacy)
+        # An empty placeholder prefix keeps the segment layout uniform
+        self.summary.segments = [Segment(), segs[-1]]
+
+    @property
+    def open_start(self) -> Stamp:
+        """Start of the session still open, None if none has started"""
+        for seg in reversed(self.summary.segments):
+            if seg.is_init and seg.start is not None:
+                return seg.start
+        prefix = self.summary.segments[0]
+        if _is_session(0, prefix, self.legacy):
+            return prefix.first_seen
+        return None
+
+    def finish(self) -> List[session]:
+        """Close whatever is still open at the end of the input"""
+        sessions = finalize(self.summary, self.legacy, self.session_count + 1)
+        self.session_count += len(sessions)
+        self.summary = ChunkSummary(last_seen=self.summary.last_seen)
+        return sessions
+
+    def to_dict(self) -> dict:
+        return {
+            "legacy": self.legacy,
+            "session_count": self.session_count,
+            "summary": self.summary.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionStateMachine":
+        machine = cls(legacy=data["legacy"])
+        machine.session_count = data["session_count"]
+        machine.summary = ChunkSummary.from_dict(data["summary"])
+        return machine
+
+
+def parse_sessions(file_path: str, legacy: bool = False) -> List[session]:
+    """Sequential parse through the state machine"""
+    machine = SessionStateMachine(legacy=legacy)
+    sessions = list(machine.feed(iter_lines(file_path)))
+    sessions.extend(machine.finish())
+    return sessions
+
+
+def _scan_range(args) -> ChunkSummary:
+    file_path, start, end = args
+    return scan_chunk(iter_line_range(file_path, start, end))
+
+
+def parse_sessions_parallel(
+    file_path: str, workers: int = 4, legacy: bool = False
+) -> List[session]:
+    """Scan byte ranges in worker processes, merge summaries, finalize once"""
+    ranges = split_ranges(file_path, workers)
+    if not ranges:
+        return []
+    jobs = [(file_path, start, end) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summaries = list(pool.map(_scan_range, jobs))
+    total = summaries[0]
+    for summary in summaries[1:]:
+        total = merge(total, summary)
+    return finalize(total, legacy)
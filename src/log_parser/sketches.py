@@ -0,0 +1,398 @@
+import base64
+import hashlib
+import json
+import math
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from log_parser.correlate import message_template, parse_timestamp
+from log_parser.log_reader import (
+    LogRecord,
+    iter_line_range,
+    iter_records,
+    read_records,
+    split_ranges,
+)
+from log_parser.report_writer import ReportWriter
+
+
+def _hash64(value: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+class HyperLogLog:
+    """Distinct-count sketch; merge is a register-wise max"""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value: str):
+        h = _hash64(value)
+        idx = h >> (64 - self.p)
+        rest = (h << self.p) & ((1 << 64) - 1)
+        rank = 64 - self.p + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        merged = HyperLogLog(self.p)
+        merged.registers = bytearray(map(max, self.registers, other.registers))
+        return merged
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting)
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> dict:
+        return {"p": self.p, "registers": _b64(bytes(self.registers))}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        hll = cls(data["p"])
+        hll.registers = bytearray(base64.b64decode(data["registers"]))
+        return hll
+
+
+class TDigest:
+    """
+    Merging t-digest for quantiles of inter-error intervals. Merge is
+    concatenate + compress, so results agree across merge orders up to the
+    sketch's accuracy rather than bit for bit.
+    """
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.centroids: List[Tuple[float, float]] = []  # (mean, weight), sorted
+        self._buffer: List[float] = []
+
+    @property
+    def count(self) -> float:
+        self._flush()
+        return sum(w for _, w in self.centroids)
+
+    def add(self, x: float):
+        self._buffer.append(x)
+        if len(self._buffer) >= 10 * self.compression:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            points = self.centroids + [(x, 1.0) for x in self._buffer]
+            self._buffer = []
+            self.centroids = self._compress(points)
+
+    def _compress(self, points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        points.sort()
+        total = sum(w for _, w in points)
+        if total == 0:
+            return []
+        out: List[Tuple[float, float]] = []
+        mean, weight = points[0]
+        done = 0.0
+        limit = self._k_limit(0.0, total)
+        for x, w in points[1:]:
+            if done + weight + w <= limit:
+                mean += (x - mean) * w / (weight + w)
+                weight += w
+            else:
+                out.append((mean, weight))
+                done += weight
+                limit = self._k_limit(done / total, total)
+                mean, weight = x, w
+        out.append((mean, weight))
+        return out
+
+    def _k_limit(self, q: float, total: float) -> float:
+        # k1 scale function: small centroids near the tails, large in the middle
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        q_next = (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+        return max(q_next, q) * total
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        self._flush()
+        other._flush()
+        merged = TDigest(self.compression)
+        merged.centroids = merged._compress(self.centroids + other.centroids)
+        return merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._flush()
+        if not self.centroids:
+            return None
+        total = sum(w for _, w in self.centroids)
+        target = q * total
+        seen = 0.0
+        for i, (mean, weight) in enumerate(self.centroids):
+            if seen + weight >= target:
+                if i == 0 or weight == 0:
+                    return mean
+                # Interpolate between neighbouring centroid means
+                prev_mean = self.centroids[i - 1][0]
+                frac = (target - seen) / weight
+                return prev_mean + (mean - prev_mean) * min(max(frac + 0.5, 0), 1)
+            seen += weight
+        return self.centroids[-1][0]
+
+    def to_dict(self) -> dict:
+        self._flush()
+        return {"compression": self.compression, "centroids": self.centroids}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.centroids = [tuple(c) for c in data["centroids"]]
+        return digest
+
+
+class CountMinSketch:
+    """Frequency sketch with a small candidate set for the top messages"""
+
+    def __init__(self, width: int = 2048, depth: int = 4, top_k: int = 20):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = [array("I", bytes(4 * width)) for _ in range(depth)]
+        self.candidates: Dict[str, int] = {}
+
+    def _columns(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=4 * self.depth).digest()
+        for row in range(self.depth):
+            yield row, int.from_bytes(digest[4 * row : 4 * row + 4], "big") % self.width
+
+    def add(self, value: str, count: int = 1):
+        estimate = None
+        for row, col in self._columns(value):
+            self.table[row][col] += count
+            cell = self.table[row][col]
+            estimate = cell if estimate is None else min(estimate, cell)
+        self._offer(value, estimate)
+
+    def _offer(self, value: str, estimate: int):
+        self.candidates[value] = estimate
+        if len(self.candidates) > 2 * self.top_k:
+            keep = sorted(self.candidates.items(), key=lambda kv: -kv[1])
+            self.candidates = dict(keep[: self.top_k])
+
+    def estimate(self, value: str) -> int:
+        return min(self.table[row][col] for row, col in self._columns(value))
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        merged = CountMinSketch(self.width, self.depth, self.top_k)
+        for row in range(self.depth):
+            merged.table[row] = array(
+                "I", map(int.__add__, self.table[row], other.table[row])
+            )
+        for value in set(self.candidates) | set(other.candidates):
+            merged._offer(value, merged.estimate(value))
+        return merged
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(
+            ((v, self.estimate(v)) for v in self.candidates), key=lambda kv: -kv[1]
+        )
+        return ranked[: n or self.top_k]
+
+    def to_dict(self) -> dict:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "top_k": self.top_k,
+            "table": [_b64(row.tobytes()) for row in self.table],
+            "candidates": self.candidates,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountMinSketch":
+        cms = cls(data["width"], data["depth"], data["top_k"])
+        for row, encoded in enumerate(data["table"]):
+            cms.table[row] = array("I")
+            cms.table[row].frombytes(base64.b64decode(encoded))
+        cms.candidates = dict(data["candidates"])
+        return cms
+
+
+@dataclass
+class NamespaceSummary:
+    levels: Counter = field(default_factory=Counter)
+    distinct_messages: HyperLogLog = field(default_factory=HyperLogLog)
+    intervals: TDigest = field(default_factory=TDigest)  # seconds between errors
+    top_messages: CountMinSketch = field(default_factory=CountMinSketch)
+    first_error: Optional[float] = None  # epoch seconds
+    last_error: Optional[float] = None
+
+    @property
+    def errors(self) -> int:
+        return self.levels.get("ERROR", 0)
+
+    def add(self, record: LogRecord):
+        self.levels[record.level] += 1
+        if record.level != "ERROR":
+            return
+        message = record.line.split(" - ", 1)[-1]
+        template = message_template(message)
+        self.distinct_messages.add(template)
+        self.top_messages.add(template)
+        if record.date is None:
+            return
+        ts = parse_timestamp(record.date, record.time).timestamp()
+        if self.last_error is not None and ts >= self.last_error:
+            self.intervals.add(ts - self.last_error)
+        if self.first_error is None:
+            self.first_error = ts
+        self.last_error = ts
+
+    def merge(self, other: "NamespaceSummary") -> "NamespaceSummary":
+        """other covers the time range after self"""
+        merged = NamespaceSummary(
+            levels=self.levels + other.levels,
+            distinct_messages=self.distinct_messages.merge(other.distinct_messages),
+            intervals=self.intervals.merge(other.intervals),
+            top_messages=self.top_messages.merge(other.top_messages),
+            first_error=self.first_error
+            if self.first_error is not None
+            else other.first_error,
+            last_error=other.last_error
+            if other.last_error is not None
+            else self.last_error,
+        )
+        if self.last_error is not None and other.first_error is not None:
+            # The interval spanning the boundary between the two ranges
+            merged.intervals.add(max(other.first_error - self.last_error, 0.0))
+        return merged
+
+    def to_dict(self) -> dict:
+        return {
+            "levels": dict(self.levels),
+            "distinct_messages": self.distinct_messages.to_dict(),
+            "intervals": self.intervals.to_dict(),
+            "top_messages": self.top_messages.to_dict(),
+            "first_error": self.first_error,
+            "last_error": self.last_error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NamespaceSummary":
+        return cls(
+            levels=Counter(data["levels"]),
+            distinct_messages=HyperLogLog.from_dict(data["distinct_messages"]),
+            intervals=TDigest.from_dict(data["intervals"]),
+            top_messages=CountMinSketch.from_dict(data["top_messages"]),
+            first_error=data["first_error"],
+            last_error=data["last_error"],
+        )
+
+
+Summaries = Dict[str, NamespaceSummary]
+
+
+def summarize_records(records: Iterable[LogRecord]) -> Summaries:
+    summaries: Summaries = {}
+    for record in records:
+        if record.namespace:
+            summary = summaries.get(record.namespace)
+            if summary is None:
+                summary = summaries[record.namespace] = NamespaceSummary()
+            summary.add(record)
+    return summaries
+
+
+def summarize_file(file_path: str) -> Summaries:
+    return summarize_records(read_records(file_path))
+
+
+def merge_summaries(left: Summaries, right: Summaries) -> Summaries:
+    """right covers the time range after left; namespaces are unioned"""
+    merged = dict(left)
+    for namespace, summary in right.items():
+        if namespace in merged:
+            merged[namespace] = merged[namespace].merge(summary)
+        else:
+            merged[namespace] = summary
+    return merged
+
+
+def _summarize_range(args) -> Summaries:
+    file_path, start, end = args
+    return summarize_records(iter_records(iter_line_range(file_path, start, end)))
+
+
+def summarize_file_parallel(file_path: str, workers: int = 4) -> Summaries:
+    """Sketch byte ranges of one log in worker processes and merge in order"""
+    jobs = [(file_path, start, end) for start, end in split_ranges(file_path, workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_summarize_range, jobs))
+    return reduce(merge_summaries, parts, {})
+
+
+def summarize_files(file_paths: List[str], workers: int = 4) -> Summaries:
+    """Sketch each (daily) log in its own process, then merge in order"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(summarize_file, file_paths))
+    return reduce(merge_summaries, parts, {})
+
+
+def save_summaries(summaries: Summaries, output_file: str):
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({ns: s.to_dict() for ns, s in summaries.items()}, f)
+
+
+def load_summaries(input_file: str) -> Summaries:
+    with open(input_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {ns: NamespaceSummary.from_dict(s) for ns, s in data.items()}
+
+
+def write_sketch_summary(summaries: Summaries, output_file: str, top: int = 5):
+    """Like _SUMMARY.txt, with distinct counts, interval quantiles and top messages"""
+    with ReportWriter(output_file) as out:
+        out.write("=" * 100 + "\n")
+        out.write("ERROR LOG SUMMARY (SKETCHES)\n")
+        out.write("=" * 100 + "\n\n")
+        for namespace in sorted(summaries, key=lambda ns: -summaries[ns].errors):
+            s = summaries[namespace]
+            out.write(f"{namespace}\n")
+            out.write(f"  Count: {s.errors} error(s)\n")
+            levels = ", ".join(f"{k}={v}" for k, v in sorted(s.levels.items()))
+            out.write(f"  Levels: {levels}\n")
+            if not s.errors:
+                out.write("\n")
+                continue
+            out.write(f"  Distinct messages (approx): {s.distinct_messages.count()}\n")
+            if s.intervals.count:
+                p50, p90, p99 = (s.intervals.quantile(q) for q in (0.5, 0.9, 0.99))
+                out.write(
+                    f"  Interval between errors: p50 {p50:.1f}s  "
+                    f"p90 {p90:.1f}s  p99 {p99:.1f}s\n"
+                )
+            for message, count in s.top_messages.top(top):
+                out.write(f"    ~{count:6d}  {message}\n")
+            out.write("\n")
+
+
+if __name__ == "__main__":
+    # Configuration - Change these to your file names
+    daily_logs = [
+        "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-23/App.log",
+        "/home/dhruvkumarjiguda/code/log_parser/2601/App/2026-01-24/App.log",
+    ]
+
+    weekly = summarize_files(daily_logs)
+    save_summaries(weekly, "error_sketches.json")
+    write_sketch_summary(weekly, "_SKETCH_SUMMARY.txt")
+    print("Sketch summary written to _SKETCH_SUMMARY.txt")
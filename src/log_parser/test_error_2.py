@@ -1,9 +1,129 @@
+import json
 import os
-import re
+import shutil
+import tempfile
+import zipfile
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
+from log_parser.error_index import INDEX_NAME, ErrorIndex
+from log_parser.log_reader import LEVEL_RE, read_records
+from log_parser.report_writer import (
+    ReportWriter,
+    format_error_file,
+    format_error_summary,
+)
 
-def create_separate_error_files(input_file, output_folder="error_logs"):
+
+SUMMARY_NAME = "_SUMMARY.txt"
+ARCHIVE_NAME = "_ERRORS.zip"
+
+
+def namespace_filename(namespace):
+    """Safe file name for a namespace"""
+    return namespace.replace(".", "_") + ".txt"
+
+
+def _entries(record):
+    """
+    (level, namespace, lines) entries of a record. A line without a leading
+    timestamp that carries its own level and namespace starts an entry of
+    its own, as when every line was matched separately; other continuation
+    lines (stack traces) stay with the entry before them.
+    """
+    level, namespace = record.level, record.namespace
+    if record.date is None:
+        match = LEVEL_RE.search(record.line)
+        if match:
+            level, namespace = match.groups()
+    entries = [(level, namespace, [record.line])]
+    for line in record.continuation:
+        match = LEVEL_RE.search(line)
+        if match:
+            entries.append((*match.groups(), [line]))
+        else:
+            entries[-1][2].append(line)
+    return entries
+
+
+def _write_namespace_file(output_folder, namespace, logs):
+    output_file = os.path.join(output_folder, namespace_filename(namespace))
+    # Each file is rendered from templates and written in one call
+    with ReportWriter(output_file) as outfile:
+        outfile.write(format_error_file(namespace, logs))
+    return output_file
+
+
+class SpilledGroups:
+    """
+    namespace -> error texts, like error_groups, but buffered lines are
+    flushed to per-namespace JSON-lines files in a temp folder whenever the
+    buffer passes spill_bytes. Reading a namespace back loads only that one.
+    """
+
+    def __init__(self, spill_dir, spill_bytes):
+        self.spill_dir = tempfile.mkdtemp(prefix="spill_", dir=spill_dir)
+        self.spill_bytes = spill_bytes
+        self.counts = defaultdict(int)
+        self._buffer = defaultdict(list)
+        self._buffered = 0
+        self._files = {}
+
+    def append(self, namespace, text):
+        self.counts[namespace] += 1
+        self._buffer[namespace].append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.spill_bytes:
+            self.flush()
+
+    def flush(self):
+        for namespace, texts in self._buffer.items():
+            path = self._files.setdefault(
+                namespace, os.path.join(self.spill_dir, f"{len(self._files)}.jsonl")
+            )
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(t) + "\n" for t in texts)
+        self._buffer.clear()
+        self._buffered = 0
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __getitem__(self, namespace):
+        return self.get(namespace, [])
+
+    def get(self, namespace, default=None):
+        if namespace not in self.counts:
+            return default
+        texts = []
+        path = self._files.get(namespace)
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                texts = [json.loads(line) for line in f]
+        return texts + self._buffer.get(namespace, [])
+
+    def cleanup(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def read_archived_namespace(archive_file, namespace):
+    """Return the error file text for one namespace from an archive"""
+    with zipfile.ZipFile(archive_file) as archive:
+        return archive.read(namespace_filename(namespace)).decode("utf-8")
+
+
+def create_separate_error_files(
+    input_file,
+    output_folder="error_logs",
+    workers=8,
+    archive=False,
+    verbose=False,
+    progress_every=100,
+    index=False,
+    spill_bytes=None,
+    records=None,
+    spill_dir=None,
+):
     """
     Create separate text files for each unique namespace.
     Creates empty files for namespaces with no ERROR logs.
@@ -11,7 +131,23 @@ def create_separate_error_files(input_file, output_folder="error_logs"):
     Args:
         input_file: Path to the input log file
         output_folder: Folder where separate files will be created
+        workers: Threads used to write the namespace files
+        archive: Write every namespace plus the summary into one indexed
+            zip archive (_ERRORS.zip) instead of one .txt file per namespace
+        verbose: Print a line for every file created
+        progress_every: Print a progress line after this many files
+        index: Also write a trigram search index of the errors (_ERRORS.idx)
+        spill_bytes: Keep at most this many bytes of error text in memory,
+            spilling the rest to temp files in output_folder (same output)
+        records: Records to split instead of reading input_file, e.g. a
+            merged multi-station timeline; tagged errors are prefixed with
+            their [source]
+        spill_dir: Folder for the spill files instead of output_folder
+
+    Errors are printed and then re-raised, so a build or batch job running
+    the split fails instead of recording partial output as done.
     """
+    error_groups = None
     try:
         # Create output folder if it doesn't exist
         if not os.path.exists(output_folder):
@@ -19,108 +155,88 @@ def create_separate_error_files(input_file, output_folder="error_logs"):
             print(f"Created output folder: '{output_folder}'")
 
         # Dictionary to store errors grouped by namespace
-        error_groups = defaultdict(list)
+        if spill_bytes:
+            error_groups = SpilledGroups(spill_dir or output_folder, spill_bytes)
+            add_error = error_groups.append
+        else:
+            error_groups = defaultdict(list)
+            add_error = lambda ns, text: error_groups[ns].append(text)  # noqa: E731
         # Set to store all unique namespaces (regardless of log level)
         all_namespaces = set()
 
-        # Read the log file
-        with open(input_file, "r", encoding="utf-8") as infile:
-            for line in infile:
-                # Extract namespace for any log level (ERROR, INFO, WARN, etc.)
-                match = re.search(
-                    r"\[\d+\]\s+(ERROR|INFO|WARN|DEBUG|TRACE)\s+([\w\.]+)\s+-", line
-                )
-                if match:
-                    log_level = match.group(1)
-                    namespace = match.group(2)
-
+        # Read the log file; stack traces stay attached to their ERROR line
+        if records is None:
+            records = read_records(input_file)
+        for record in records:
+            for level, namespace, lines in _entries(record):
+                # Namespace for any log level (ERROR, INFO, WARN, etc.)
+                if namespace:
                     # Add to all namespaces set
                     all_namespaces.add(namespace)
 
                     # If it's an ERROR, add to error_groups
-                    if log_level == "ERROR":
-                        error_groups[namespace].append(line.strip())
+                    if level == "ERROR":
+                        text = "\n".join(lines).strip()
+                        if record.source:
+                            text = f"[{record.source}] {text}"
+                        add_error(namespace, text)
 
         # Create files for all namespaces
-        file_count = 0
-        error_file_count = 0
-        empty_file_count = 0
-        total_errors = 0
-
-        for namespace in sorted(all_namespaces):
-            # Create a safe filename from namespace
-            safe_filename = namespace.replace(".", "_")
-            output_file = os.path.join(output_folder, f"{safe_filename}.txt")
-
-            logs = error_groups.get(namespace, [])
-
-            # Write logs to separate file
-            with open(output_file, "w", encoding="utf-8") as outfile:
-                outfile.write("=" * 100 + "\n")
-                outfile.write(f"ERROR LOGS FOR: {namespace}\n")
-                outfile.write("=" * 100 + "\n")
-
-                if logs:
-                    outfile.write(f"Total errors: {len(logs)}\n")
-                    outfile.write("=" * 100 + "\n\n")
-
-                    for log in logs:
-                        outfile.write(f"{log}\n")
-
-                    outfile.write("\n" + "=" * 100 + "\n")
-                    outfile.write(f"END OF LOG - Total: {len(logs)} error(s)\n")
-                    error_file_count += 1
-                    total_errors += len(logs)
-                else:
-                    outfile.write(f"Total errors: 0\n")
-                    outfile.write("=" * 100 + "\n\n")
-                    outfile.write("*** NO ERROR LOGS FOUND FOR THIS NAMESPACE ***\n\n")
-                    outfile.write("=" * 100 + "\n")
-                    empty_file_count += 1
-
-                outfile.write("=" * 100 + "\n")
-
-            file_count += 1
-            status = f"({len(logs)} errors)" if logs else "(EMPTY)"
-            print(f"Created: {output_file} {status}")
-
-        # Create summary file
-        summary_file = os.path.join(output_folder, "_SUMMARY.txt")
-        with open(summary_file, "w", encoding="utf-8") as summary:
-            summary.write("=" * 100 + "\n")
-            summary.write("ERROR LOG SUMMARY\n")
-            summary.write("=" * 100 + "\n\n")
-
-            summary.write("NAMESPACES WITH ERRORS:\n")
-            summary.write("-" * 100 + "\n")
-            for namespace in sorted(error_groups.keys()):
-                count = len(error_groups[namespace])
-                summary.write(f"{namespace}\n")
-                summary.write(f"  Count: {count} error(s)\n\n")
-
-            summary.write("\n" + "=" * 100 + "\n\n")
-            summary.write("NAMESPACES WITHOUT ERRORS:\n")
-            summary.write("-" * 100 + "\n")
-            namespaces_without_errors = sorted(
-                all_namespaces - set(error_groups.keys())
-            )
-            if namespaces_without_errors:
-                for namespace in namespaces_without_errors:
-                    summary.write(f"{namespace}\n")
-                    summary.write(f"  Count: 0 error(s)\n\n")
-            else:
-                summary.write("(None)\n\n")
-
-            summary.write("=" * 100 + "\n")
-            summary.write(f"Total unique namespaces: {file_count}\n")
-            summary.write(f"Namespaces with errors: {error_file_count}\n")
-            summary.write(f"Namespaces without errors: {empty_file_count}\n")
-            summary.write(f"Total error logs: {total_errors}\n")
-            summary.write("=" * 100 + "\n")
+        namespaces = sorted(all_namespaces)
+        if spill_bytes:
+            error_counts = dict(error_groups.counts)
+        else:
+            error_counts = {ns: len(logs) for ns, logs in error_groups.items()}
+        file_count = len(namespaces)
+        error_file_count = len(error_counts)
+        empty_file_count = file_count - error_file_count
+        total_errors = sum(error_counts.values())
+        summary_text = format_error_summary(error_counts, all_namespaces)
+
+        if archive:
+            # One indexed file: each namespace is a member that can be read alone
+            summary_file = os.path.join(output_folder, ARCHIVE_NAME)
+            with zipfile.ZipFile(
+                summary_file, "w", compression=zipfile.ZIP_DEFLATED
+            ) as zf:
+                for namespace in namespaces:
+                    zf.writestr(
+                        namespace_filename(namespace),
+                        format_error_file(namespace, error_groups.get(namespace, [])),
+                    )
+                zf.writestr(SUMMARY_NAME, summary_text)
+            print(f"Archived {file_count} namespaces into {summary_file}")
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                written = pool.map(
+                    lambda ns: _write_namespace_file(
+                        output_folder, ns, error_groups.get(ns, [])
+                    ),
+                    namespaces,
+                )
+                for done, (namespace, output_file) in enumerate(
+                    zip(namespaces, written), start=1
+                ):
+                    if verbose:
+                        count = error_counts.get(namespace, 0)
+                        status = f"({count} errors)" if count else "(EMPTY)"
+                        print(f"Created: {output_file} {status}")
+                    elif done % progress_every == 0 or done == file_count:
+                        print(f"  Written {done}/{file_count} files")
+
+            # Create summary file
+            summary_file = os.path.join(output_folder, SUMMARY_NAME)
+            with ReportWriter(summary_file) as summary:
+                summary.write(summary_text)
+
+        if index:
+            index_file = os.path.join(output_folder, INDEX_NAME)
+            ErrorIndex.from_groups(error_groups).save(index_file)
+            print(f"Indexed {total_errors} errors into {index_file}")
 
         print(f"\n{'=' * 60}")
         print(f"SUMMARY:")
-        print(f"  Total files created: {file_count}")
+        print(f"  Total namespaces written: {file_count}")
         print(f"  Files with errors: {error_file_count}")
         print(f"  Empty files: {empty_file_count}")
         print(f"  Total errors processed: {total_errors}")
@@ -130,8 +246,13 @@ def create_separate_error_files(input_file, output_folder="error_logs"):
 
     except FileNotFoundError:
         print(f"Error: File '{input_file}' not found!")
+        raise
     except Exception as e:
         print(f"An error occurred: {e}")
+        raise
+    finally:
+        if isinstance(error_groups, SpilledGroups):
+            error_groups.cleanup()
 
 
 if __name__ == "__main__":
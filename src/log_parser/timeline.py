@@ -0,0 +1,238 @@
+"""
+One time-ordered record stream from several station/service logs.
+
+Each log is read lazily and tagged with its source; a k-way heap merge
+keeps one pending record per source, so memory does not grow with the
+number or size of the logs. Records compare on their (date, time) text,
+which sorts chronologically for this timestamp format; ties keep the
+order the sources were given in.
+
+The stream feeds:
+  * sessions_by_source - one session state machine per station
+  * create_separate_error_files(records=...) - errors tagged [source]
+  * timeline_lines / bucket_counts - correlate.py and time-bucket views
+"""
+
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from log_parser.correlate import merge_sorted, parse_timestamp
+from log_parser.log_reader import (
+    RECORD_RE,
+    LogRecord,
+    iter_line_range,
+    iter_records,
+)
+from log_parser.session_state import SessionStateMachine
+from log_parser.uph_parser import session
+
+Sources = Union[Mapping[str, str], Iterable[str]]
+
+# Stop bisecting once the window is this small and scan the rest
+SEEK_SLACK = 64 * 1024
+
+
+def source_name(log_path: str) -> str:
+    """Default tag: the folder a log sits in (station or service name)"""
+    return os.path.basename(os.path.dirname(os.path.abspath(log_path))) or log_path
+
+
+def source_names(log_paths: Iterable[str]) -> Dict[str, str]:
+    """
+    Default {tag: path} for several logs: each log's folder relative to the
+    folder they all sit under ("App/2026-01-24", "Svc/2026-01-24"), or its
+    file path when logs share a folder. A lone log keeps source_name's tag.
+    """
+    paths = list(log_paths)
+    if not paths:
+        return {}
+    folders = [os.path.dirname(os.path.abspath(p)) for p in paths]
+    root = os.path.commonpath(folders)
+    if len(set(folders)) == 1:
+        root = os.path.dirname(root)
+    shared = len(set(folders)) < len(folders)
+    names: Dict[str, str] = {}
+    for path, folder in zip(paths, folders):
+        name = os.path.relpath(
+            os.path.abspath(path) if shared else folder, root
+        )
+        if name in names:
+            raise ValueError(f"{names[name]} and {path} are both tagged '{name}'")
+        names[name] = path
+    return names
+
+
+def _stamp(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d %H:%M:%S,") + f"{ts.microsecond // 1000:03d}"
+
+
+def _stamp_at(f, offset: int) -> Tuple[Optional[str], int]:
+    """First (date time) at or after a byte offset, and that line's offset"""
+    f.seek(offset)
+    if offset:
+        f.readline()  # finish the line we landed in
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line:
+            return None, pos
+        ts = RECORD_RE.match(line.decode("utf-8", "replace"))
+        if ts:
+            return f"{ts['date']} {ts['time']}", pos
+
+
+def seek_offset(log_path: str, start: str) -> int:
+    """
+    Byte offset of a line start at or before the first record stamped
+    >= start ("YYYY-MM-DD HH:MM:SS,mmm"), found by bisecting the file.
+    Logs are appended in time order, so the file itself is the index.
+    """
+    size = os.path.getsize(log_path)
+    lo, hi = 0, size
+    with open(log_path, "rb") as f:
+        while hi - lo > SEEK_SLACK:
+            mid = (lo + hi) // 2
+            stamp, pos = _stamp_at(f, mid)
+            if stamp is None or stamp >= start:
+                hi = mid
+            else:
+                lo = pos
+    return lo
+
+
+def iter_source(
+    log_path: str,
+    source: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[LogRecord]:
+    """Records of one log tagged with their source, optionally windowed"""
+    source = source or source_name(log_path)
+    offset = 0
+    start_key = end_key = None
+    if start is not None:
+        start_key = _stamp(start)
+        offset = seek_offset(log_path, start_key)
+    if end is not None:
+        end_key = _stamp(end)
+
+    lines = iter_line_range(log_path, offset, os.path.getsize(log_path))
+    for record in iter_records(lines):
+        if record.date is not None:
+            key = f"{record.date} {record.time}"
+            if start_key is not None and key < start_key:
+                continue
+            if end_key is not None and key >= end_key:
+                break
+        elif offset:
+            # Continuation lines cut off by the seek
+            continue
+        record.source = source
+        yield record
+
+
+def _record_key(record: LogRecord) -> Tuple[str, str]:
+    # Undated records (text before a log's first timestamp) sort first
+    return (record.date or "", record.time or "")
+
+
+def merge_logs(
+    sources: Sources,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[LogRecord]:
+    """
+    Time-ordered records from several logs.
+
+    Args:
+        sources: {source name: log path}, or log paths tagged by
+            source_names (their folders relative to a common root)
+        start, end: Optional window; each log is bisected to start
+    """
+    if not isinstance(sources, Mapping):
+        sources = source_names(sources)
+    streams = [
+        iter_source(path, name, start, end) for name, path in sources.items()
+    ]
+    return merge_sorted(*streams, key=_record_key)
+
+
+# ============================================================================
+# Consumers
+# ============================================================================
+
+
+def record_lines(record: LogRecord) -> List[str]:
+    return [record.line + "\n", *(line + "\n" for line in record.continuation)]
+
+
+def timeline_lines(records: Iterable[LogRecord]) -> Iterator[str]:
+    """Merged text lines, for the line-based helpers in correlate.py"""
+    for record in records:
+        yield from record_lines(record)
+
+
+def sessions_by_source(
+    records: Iterable[LogRecord], legacy: bool = True
+) -> Iterator[Tuple[str, session]]:
+    """
+    (source, session) pairs in the order sessions close. Each station keeps
+    its own state machine, so interleaved restarts don't cut each other's
+    sessions; legacy=True gives read_log's numbers per station.
+    """
+    machines: Dict[str, SessionStateMachine] = {}
+    for record in records:
+        machine = machines.get(record.source)
+        if machine is None:
+            machine = machines[record.source] = SessionStateMachine(legacy=legacy)
+        for s in machine.feed(record_lines(record)):
+            yield record.source, s
+    for source, machine in machines.items():
+        for s in machine.finish():
+            yield source, s
+
+
+def bucket_counts(
+    records: Iterable[LogRecord],
+    bucket_seconds: int = 300,
+    level: Optional[str] = "ERROR",
+) -> Dict[datetime, Counter]:
+    """Records per time bucket and source (level=None counts every record)"""
+    width = timedelta(seconds=bucket_seconds)
+    buckets: Dict[datetime, Counter] = defaultdict(Counter)
+    for record in records:
+        if record.date is None or (level is not None and record.level != level):
+            continue
+        ts = parse_timestamp(record.date, record.time)
+        bucket = datetime.min + (ts - datetime.min) // width * width
+        buckets[bucket][record.source] += 1
+    return dict(buckets)
+
+
+if __name__ == "__main__":
+    from log_parser.test_error_2 import create_separate_error_files
+
+    # Configuration - Change these to your stations' logs
+    log_root = "/home/dhruvkumarjiguda/code/log_parser/2601"
+    stations = {
+        "station_a": f"{log_root}/App/2026-01-24/App.log",
+        "station_b": f"{log_root}/Svc/2026-01-24/App.log",
+    }
+    stations = {name: path for name, path in stations.items() if os.path.exists(path)}
+
+    for source, s in sessions_by_source(merge_logs(stations)):
+        print(f"{source}: session {s.session_id} {s.date} {s.start_time} UPH {s.uph}")
+    create_separate_error_files(
+        "merged", "error_logs_merged", records=merge_logs(stations)
+    )
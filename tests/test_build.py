@@ -0,0 +1,107 @@
+import pytest
+
+from log_parser.build import BuildGraph, Node
+
+
+# Node functions run in worker processes, so they live at module level
+def upper(inputs, outputs):
+    with open(inputs[0]) as src, open(outputs[0], "w") as dst:
+        dst.write(src.read().upper())
+
+
+def concat(inputs, outputs):
+    with open(outputs[0], "w") as dst:
+        for path in inputs:
+            with open(path) as src:
+                dst.write(src.read())
+
+
+def fail(inputs, outputs):
+    raise ValueError("broken")
+
+
+def write_nothing(inputs, outputs):
+    pass
+
+
+def _graph(tmp_path, first=upper):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    if not a.exists():
+        a.write_text("x")
+        b.write_text("y")
+    up, out = str(tmp_path / "out" / "a.up"), str(tmp_path / "out" / "all.txt")
+    nodes = [
+        Node("up", first, [str(a)], [up]),
+        Node("cat", concat, [up, str(b)], [out]),
+    ]
+    return BuildGraph(nodes, str(tmp_path / "state.json")), a, b, out
+
+
+def test_second_build_is_fresh(tmp_path):
+    graph, _, _, out = _graph(tmp_path)
+    report = graph.build(workers=1)
+    assert sorted(report.ran) == ["cat", "up"]
+    assert open(out).read() == "Xy"
+
+    report = graph.build(workers=1)
+    assert report.ran == [] and sorted(report.fresh) == ["cat", "up"]
+
+
+def test_only_stale_nodes_rerun(tmp_path):
+    graph, a, b, out = _graph(tmp_path)
+    graph.build(workers=1)
+
+    b.write_text("z")
+    report = graph.build(workers=1)
+    assert report.ran == ["cat"] and report.fresh == ["up"]
+    assert open(out).read() == "Xz"
+
+    # up reruns, but its output is unchanged, so cat stays fresh
+    a.write_text("X")
+    report = graph.build(workers=1)
+    assert report.ran == ["up"] and report.fresh == ["cat"]
+
+
+def test_missing_output_reruns_node(tmp_path):
+    graph, _, _, out = _graph(tmp_path)
+    graph.build(workers=1)
+    (tmp_path / "out" / "all.txt").unlink()
+    assert graph.build(workers=1).ran == ["cat"]
+    assert open(out).read() == "Xy"
+
+
+def test_failure_blocks_downstream(tmp_path):
+    graph, _, _, _ = _graph(tmp_path, first=fail)
+    report = graph.build(workers=1)
+    assert list(report.failed) == ["up"]
+    assert "ValueError: broken" in report.failed["up"]
+    assert report.blocked == ["cat"] and report.ran == []
+
+    # Nothing was recorded for the failed node, so the fixed graph runs all
+    graph, _, _, _ = _graph(tmp_path)
+    assert sorted(graph.build(workers=1).ran) == ["cat", "up"]
+
+
+def test_unwritten_output_is_a_failure(tmp_path):
+    graph, _, _, _ = _graph(tmp_path, first=write_nothing)
+    report = graph.build(workers=1)
+    assert "outputs not written" in report.failed["up"]
+    assert report.blocked == ["cat"]
+
+
+def test_cycle_is_rejected(tmp_path):
+    x, y = str(tmp_path / "x"), str(tmp_path / "y")
+    with pytest.raises(ValueError, match="cycle"):
+        BuildGraph(
+            [Node("x", upper, [y], [x]), Node("y", upper, [x], [y])],
+            str(tmp_path / "state.json"),
+        )
+
+
+def test_output_with_two_producers_is_rejected(tmp_path):
+    x = str(tmp_path / "x")
+    with pytest.raises(ValueError, match="produced by two nodes"):
+        BuildGraph(
+            [Node("x1", upper, [], [x]), Node("x2", upper, [], [x])],
+            str(tmp_path / "state.json"),
+        )
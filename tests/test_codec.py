@@ -0,0 +1,51 @@
+import random
+
+from log_parser.codec import (
+    decode_blocks,
+    decode_postings,
+    encode_block,
+    encode_postings,
+)
+
+
+def _rows(rng, n, width):
+    return [
+        tuple(
+            rng.choice((0, -1, 1, -(2**40), 2**40, rng.randint(-999, 999)))
+            for _ in range(width)
+        )
+        for _ in range(n)
+    ]
+
+
+def test_block_round_trip():
+    rows = [(0, 0, 0), (1, -1, 127), (-128, 128, -(2**63)), (2**63, 5, 5)]
+    assert list(decode_blocks(encode_block(rows, 3), 3)) == rows
+
+
+def test_concatenated_blocks_decode_in_order():
+    rng = random.Random(0)
+    blocks = [_rows(rng, n, 4) for n in (1, 0, 300, 17)]
+    data = b"".join(encode_block(rows, 4) for rows in blocks)
+    assert list(decode_blocks(data, 4)) == [row for rows in blocks for row in rows]
+
+
+def test_each_block_decodes_on_its_own():
+    rng = random.Random(1)
+    first, second = _rows(rng, 50, 2), _rows(rng, 50, 2)
+    data = encode_block(first, 2) + encode_block(second, 2)
+    # Appending a block never changes the bytes of the ones before it
+    assert data.startswith(encode_block(first, 2))
+    assert list(decode_blocks(encode_block(second, 2), 2)) == second
+
+
+def test_postings_round_trip():
+    rng = random.Random(2)
+    for ids in (
+        [],
+        [0],
+        [0, 1, 2],
+        [5, 200, 201, 2**35],
+        sorted(rng.sample(range(10**6), 1000)),
+    ):
+        assert decode_postings(encode_postings(ids)) == ids
@@ -0,0 +1,35 @@
+from log_parser.test_error_2 import SUMMARY_NAME, create_separate_error_files
+
+LOG = """\
+[1] INFO Boot.Early - starting
+2026-01-24 08:00:00,000 [7] INFO Services.Metrics - ok
+2026-01-24 08:00:01,000 [7] ERROR Services.IO - write failed
+   at Services.IO.Write()
+[4] ERROR Cont.Inner - nested failure
+   at Cont.Inner.Run()
+2026-01-24 08:00:02,000 [7] ERROR Services.IO - write failed again
+"""
+
+
+def test_undated_leveled_lines_keep_their_namespace(tmp_path):
+    log = tmp_path / "App.log"
+    log.write_text(LOG, encoding="utf-8")
+    out = tmp_path / "errors"
+    create_separate_error_files(str(log), str(out))
+
+    assert sorted(p.name for p in out.iterdir()) == [
+        "Boot_Early.txt",
+        "Cont_Inner.txt",
+        "Services_IO.txt",
+        "Services_Metrics.txt",
+        SUMMARY_NAME,
+    ]
+    inner = (out / "Cont_Inner.txt").read_text(encoding="utf-8")
+    assert "Total errors: 1\n" in inner
+    assert "[4] ERROR Cont.Inner - nested failure\n   at Cont.Inner.Run()\n" in inner
+
+    # Errors keep their stack trace, but not the next leveled line
+    io = (out / "Services_IO.txt").read_text(encoding="utf-8")
+    assert "Total errors: 2\n" in io
+    assert "write failed\n   at Services.IO.Write()\n" in io
+    assert "nested failure" not in io
@@ -0,0 +1,5 @@
+from log_parser.parser_check import run_generated
+
+
+def test_backends_match_reference():
+    assert run_generated(n_logs=20) == []
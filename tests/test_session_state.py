@@ -0,0 +1,75 @@
+import json
+import random
+from dataclasses import replace
+
+import pytest
+
+from log_parser.parser_check import generate_noisy_log
+from log_parser.session_state import (
+    SessionStateMachine,
+    finalize,
+    merge,
+    scan_chunk,
+)
+from log_parser.uph_parser import iter_sessions
+
+
+def _lines(seed, n_lines=400):
+    raw = generate_noisy_log(random.Random(seed), n_lines)
+    return [
+        line.rstrip(b"\r\n").decode("utf-8", errors="replace") + "\n" for line in raw
+    ]
+
+
+def _straight(lines, legacy):
+    machine = SessionStateMachine(legacy=legacy)
+    sessions = list(machine.feed(lines))
+    return sessions + machine.finish()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_legacy_matches_read_log(seed):
+    lines = _lines(seed)
+    legacy = _straight(lines, legacy=True)
+    assert legacy
+    # read_log does not record end_date
+    assert [replace(s, end_date=None) for s in legacy] == list(iter_sessions(lines))
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_checkpoint_resume_matches_straight_parse(seed, legacy):
+    lines = _lines(seed)
+    expected = _straight(lines, legacy)
+    for cut in (0, 1, 37, len(lines) // 2, len(lines) - 1, len(lines)):
+        machine = SessionStateMachine(legacy=legacy)
+        sessions = list(machine.feed(lines[:cut]))
+        checkpoint = json.loads(json.dumps(machine.to_dict()))
+        resumed = SessionStateMachine.from_dict(checkpoint)
+        sessions += resumed.feed(lines[cut:])
+        sessions += resumed.finish()
+        assert sessions == expected, f"cut at line {cut}"
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_chunk_merge_matches_straight_parse(seed, legacy):
+    lines = _lines(seed)
+    expected = _straight(lines, legacy)
+    rng = random.Random(seed)
+    for _ in range(10):
+        a, b = sorted(rng.sample(range(len(lines) + 1), 2))
+        left, middle, right = (
+            scan_chunk(lines[:a]),
+            scan_chunk(lines[a:b]),
+            scan_chunk(lines[b:]),
+        )
+        # Associative: either grouping gives the summary of the whole input
+        assert finalize(merge(merge(left, middle), right), legacy) == expected
+        assert finalize(merge(left, merge(middle, right)), legacy) == expected
+
+
+def test_summary_round_trips_through_json():
+    summary = scan_chunk(_lines(0))
+    data = json.loads(json.dumps(summary.to_dict()))
+    assert type(summary).from_dict(data) == summary